@@ -0,0 +1,370 @@
+"""Load benchmark for the hot API endpoints.
+
+Seeds a database with events and users, then drives each scenario at a
+fixed concurrency and reports throughput and latency percentiles. Run from
+backend/:
+
+    python benchmarks/load.py                                  # SQLite, in-process
+    python benchmarks/load.py --events 50000 --concurrency 32
+    python benchmarks/load.py --database-url postgresql+psycopg2://... --reset
+    python benchmarks/load.py --url http://127.0.0.1:8000      # a running server
+
+    python benchmarks/load.py --save-baseline                  # record benchmarks/baseline.json
+    python benchmarks/load.py --baseline benchmarks/baseline.json --tolerance 0.2
+    python benchmarks/load.py --baseline-ref origin/main       # CI: compare with another commit
+
+By default requests go through httpx's ASGI transport straight into
+``main.create_app()``, so the numbers measure the application and not the
+network or a server. With --url the same scenarios are sent over HTTP; the
+database behind that server must have been seeded by a previous run with
+the same --database-url.
+
+Scenarios:
+  list   GET /events/ on random pages
+  get    GET /events/{id} for random ids
+  login  POST /auth/login as random users (bcrypt bound)
+  write  admin POST /events/ and PUT /events/{id}, alternating
+
+With a baseline, a run fails (exit 1) when a scenario's throughput drops,
+or its p95/p99 rises, by more than --tolerance.
+
+Absolute numbers only compare on the same machine, so no baseline is kept
+in the repository. Record one locally with --save-baseline, or pass
+--baseline-ref: the same options are then first run on the code of that
+git ref (checked out in a temporary worktree), and its results become
+the baseline. This is what CI runs.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, time as time_of_day, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, "benchmarks", "baseline.json")
+
+SCENARIOS = ("list", "get", "login", "write")
+PASSWORD = "benchmark-password"
+ADMIN_EMAIL = "bench-admin@example.com"
+SEED = 20240501
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="database to seed and serve from (default: a temporary SQLite file)")
+    parser.add_argument("--url", help="benchmark a running server at this base URL instead of in-process")
+    parser.add_argument("--reset", action="store_true", help="delete existing events and users before seeding")
+    parser.add_argument("--events", type=int, default=10_000, help="events to seed")
+    parser.add_argument("--users", type=int, default=50, help="normal users to seed")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight per scenario")
+    parser.add_argument("--requests", type=int, default=2_000, help="requests per scenario (login: a tenth)")
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests before each scenario")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of scenarios")
+    parser.add_argument("--no-cache", action="store_true", help="disable the response cache (RESPONSE_CACHE_SIZE=0)")
+    parser.add_argument("--baseline", help=f"compare with this result file (default: {DEFAULT_BASELINE} if present)")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--baseline-ref", help="first benchmark this git ref on this machine and use it as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression (0.15 = 15%%)")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+    unknown = set(args.scenarios.split(",")) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    if args.baseline_ref and (args.database_url or args.url):
+        parser.error("--baseline-ref runs both revisions on their own temporary SQLite database")
+    if args.baseline_ref and args.save_baseline:
+        parser.error("--baseline-ref and --save-baseline cannot be combined")
+    return args
+
+
+# Options that are not forwarded to the run of the baseline ref
+_OWN_OPTIONS = {"--baseline": True, "--baseline-ref": True, "--output": True, "--save-baseline": False}
+
+
+def record_baseline_at(ref: str) -> str:
+    """Run this benchmark with the same options on the code of ``ref`` and
+    return the path of its results"""
+    forwarded = []
+    argv = iter(sys.argv[1:])
+    for arg in argv:
+        name = arg.split("=", 1)[0]
+        if name in _OWN_OPTIONS:
+            if _OWN_OPTIONS[name] and "=" not in arg:
+                next(argv, None)
+            continue
+        forwarded.append(arg)
+
+    repo = subprocess.run(
+        ["git", "rev-parse", "--show-toplevel"], cwd=BACKEND_DIR, check=True, capture_output=True, text=True
+    ).stdout.strip()
+    worktree = tempfile.mkdtemp(prefix="event-bench-ref-")
+    path = os.path.join(tempfile.mkdtemp(prefix="event-bench-baseline-"), "baseline.json")
+    subprocess.run(["git", "worktree", "add", "--detach", worktree, ref], cwd=repo, check=True)
+    try:
+        script = os.path.join(worktree, os.path.relpath(os.path.abspath(__file__), repo))
+        if not os.path.exists(script):
+            raise SystemExit(f"{ref} has no {os.path.relpath(script, worktree)} to record a baseline with")
+        print(f"Recording the baseline at {ref}")
+        subprocess.run([sys.executable, script, *forwarded, "--save-baseline", "--baseline", path], check=True)
+    finally:
+        subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=repo, check=False)
+    print("\nBenchmarking the working tree")
+    return path
+
+
+def configure_environment(args) -> None:
+    # Must run before any app module is imported: they read settings at import
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='event-bench-')}/bench.db"
+    if args.no_cache:
+        os.environ["RESPONSE_CACHE_SIZE"] = "0"
+    os.environ.setdefault("STORAGE_BACKEND", "local")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Every benchmark request comes from one client and would be throttled
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+
+
+def seed(args) -> None:
+    from sqlalchemy import delete, func, insert, select
+
+    import auth
+    import migrate
+    import models
+    from database import engine
+
+    migrate.upgrade(migrate._config())
+    with engine.begin() as connection:
+        if args.reset:
+            connection.execute(delete(models.Event))
+            connection.execute(delete(models.User))
+        elif connection.execute(select(func.count(models.Event.id))).scalar():
+            print("Database already has events; reusing them (pass --reset to reseed)")
+            return
+
+    rng = random.Random(SEED)
+    password_hash = auth.get_password_hash(PASSWORD)
+    users = [{"name": "Bench Admin", "email": ADMIN_EMAIL, "password_hash": password_hash, "role": "admin"}]
+    users += [
+        {"name": f"Bench User {number}", "email": f"bench-user-{number}@example.com",
+         "password_hash": password_hash, "role": "normal"}
+        for number in range(args.users)
+    ]
+    start = date(2025, 1, 1)
+    events = [
+        {
+            "title": f"Benchmark event {number}",
+            "description": f"Seeded event {number} for load testing. " * rng.randint(1, 20),
+            "date": start + timedelta(days=rng.randint(0, 730)),
+            "time": time_of_day(rng.randint(8, 21), rng.choice((0, 15, 30, 45))),
+            "image_url": None,
+        }
+        for number in range(args.events)
+    ]
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        connection.execute(insert(models.User), users)
+        for offset in range(0, len(events), 5_000):
+            connection.execute(insert(models.Event), events[offset:offset + 5_000])
+    print(f"Seeded {len(users)} users and {len(events)} events in {time.perf_counter() - started:.1f}s")
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+async def drive(client, make_request, total: int, concurrency: int) -> dict:
+    """Send ``total`` requests with ``concurrency`` workers; return latency stats"""
+    latencies = []
+    errors = 0
+    issued = 0
+
+    async def worker():
+        nonlocal errors, issued
+        while issued < total:
+            number = issued
+            issued += 1
+            method, path, kwargs = make_request(number)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+async def login(client, email: str) -> str:
+    response = await client.post("/api/v1/auth/login", data={"username": email, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def request_factories(args, admin_headers, event_ids):
+    rng = random.Random(SEED)
+    pages = max(1, args.events // args.page_size)
+
+    def list_request(_):
+        return "GET", f"/api/v1/events/?page={rng.randint(1, pages)}&page_size={args.page_size}", {}
+
+    def get_request(_):
+        return "GET", f"/api/v1/events/{rng.choice(event_ids)}", {}
+
+    def login_request(_):
+        email = f"bench-user-{rng.randrange(max(1, args.users))}@example.com"
+        return "POST", "/api/v1/auth/login", {"data": {"username": email, "password": PASSWORD}}
+
+    def write_request(number):
+        if number % 2:
+            body = {"title": f"Benchmark update {number}"}
+            return "PUT", f"/api/v1/events/{rng.choice(event_ids)}", {"json": body, "headers": admin_headers}
+        body = {"title": f"Benchmark write {number}", "date": "2026-06-01", "time": "18:00:00",
+                "description": "Created by the load benchmark"}
+        return "POST", "/api/v1/events/", {"json": body, "headers": admin_headers}
+
+    return {"list": list_request, "get": get_request, "login": login_request, "write": write_request}
+
+
+async def run_scenarios(args, client) -> dict:
+    from sqlalchemy import select
+
+    import models
+    from database import engine
+
+    with engine.connect() as connection:
+        event_ids = list(connection.execute(select(models.Event.id)).scalars())
+    if not event_ids:
+        raise SystemExit("No events to benchmark against; seed the database first")
+
+    admin_headers = {"Authorization": f"Bearer {await login(client, ADMIN_EMAIL)}"}
+    factories = request_factories(args, admin_headers, event_ids)
+
+    results = {}
+    for name in args.scenarios.split(","):
+        total = max(1, args.requests // 10) if name == "login" else args.requests
+        warmup = max(1, args.warmup // 10) if name == "login" else args.warmup
+        await drive(client, factories[name], warmup, args.concurrency)
+        results[name] = await drive(client, factories[name], total, args.concurrency)
+        print(f"  {name:<6} done: {results[name]['rps']} req/s")
+    return results
+
+
+async def benchmark(args) -> dict:
+    import httpx
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+            return await run_scenarios(args, client)
+
+    from main import create_app
+
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    # ASGITransport does not run the lifespan, so enter it here
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            return await run_scenarios(args, client)
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """Human-readable regressions of ``results`` against ``baseline``"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        if current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {current['rps']} req/s vs baseline {previous['rps']}")
+        for metric in ("p95_ms", "p99_ms"):
+            if current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {current[metric]} vs baseline {previous[metric]}")
+        if current["errors"] > previous.get("errors", 0):
+            regressions.append(f"{name}: {current['errors']} errors vs baseline {previous.get('errors', 0)}")
+    return regressions
+
+
+def report(results: dict) -> None:
+    print(f"\n{'scenario':<10}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, row in results.items():
+        print(f"{name:<10}{row['requests']:>10}{row['errors']:>8}{row['rps']:>10}"
+              f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}")
+
+
+def main() -> int:
+    args = parse_args()
+    if args.baseline_ref:
+        # Before configure_environment, so that run gets an untouched environment
+        args.baseline = record_baseline_at(args.baseline_ref)
+    configure_environment(args)
+    if not args.url or args.database_url:
+        seed(args)
+
+    results = asyncio.run(benchmark(args))
+    report(results)
+
+    document = {
+        "config": {
+            "events": args.events, "users": args.users, "concurrency": args.concurrency,
+            "requests": args.requests, "page_size": args.page_size, "no_cache": args.no_cache,
+            "target": args.url or "in-process", "database": os.environ["DATABASE_URL"].split("://")[0],
+        },
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+
+    baseline_path = args.baseline or (DEFAULT_BASELINE if os.path.exists(DEFAULT_BASELINE) else None)
+    status = 0
+    if baseline_path and not args.save_baseline:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != document["config"]:
+            print(f"\nNote: baseline {baseline_path} was recorded with a different configuration")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nFAIL: regressions beyond {args.tolerance:.0%} against {baseline_path}:")
+            for line in regressions:
+                print(f"  {line}")
+            status = 1
+        else:
+            print(f"\nOK: within {args.tolerance:.0%} of {baseline_path}")
+
+    if args.save_baseline:
+        with open(args.baseline or DEFAULT_BASELINE, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"\nBaseline written to {args.baseline or DEFAULT_BASELINE}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
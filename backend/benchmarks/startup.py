@@ -0,0 +1,128 @@
+"""Cold-start benchmark for an API worker.
+
+Every sample runs in a fresh interpreter, because a warm module cache says
+nothing about how fast a new worker can take traffic. Run from backend/:
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 20 --budget-ms 800
+
+Reports the median time to ``import main`` (which builds the app once) and to
+build another app with ``main.create_app()``, then lists the modules with the
+largest cumulative import time. It exits non-zero when the median cold start
+exceeds ``--budget-ms`` or when a module that must stay lazy (the Cloudinary
+SDK, Pillow) gets imported during startup.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed by uploads and image variants; importing them at boot is a regression
+LAZY_MODULES = ("cloudinary", "PIL")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+main.create_app()
+built = time.perf_counter()
+print(json.dumps({
+    "import_main": imported - start,
+    "create_app": built - imported,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| *(\S+)")
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///./startup_bench.db")
+    return env
+
+
+def sample() -> dict:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True, check=True,
+    )
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+    measured["process"] = time.perf_counter() - started
+    return measured
+
+
+def import_profile(top: int):
+    """(cumulative microseconds, module) of the slowest imports"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True, check=True,
+    )
+    slowest = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            slowest.append((int(match.group(1)), match.group(2)))
+    slowest.sort(reverse=True)
+    return slowest[:top]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters to sample")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--budget-ms", type=float, help="fail when median import+create_app exceeds this")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    sample()  # populate the bytecode cache so every measured run is comparable
+    samples = [sample() for _ in range(args.runs)]
+
+    def median_ms(name):
+        return statistics.median(s[name] for s in samples) * 1000
+
+    summary = {
+        "runs": args.runs,
+        "process_ms": round(median_ms("process"), 1),
+        "import_main_ms": round(median_ms("import_main"), 1),
+        "create_app_ms": round(median_ms("create_app"), 1),
+        "eager_lazy_modules": sorted(
+            name for name in LAZY_MODULES if name in samples[0]["modules"]
+        ),
+        "slowest_imports_ms": [
+            [module, round(micros / 1000, 1)] for micros, module in import_profile(args.top)
+        ],
+    }
+    cold_start_ms = summary["import_main_ms"] + summary["create_app_ms"]
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"runs:               {summary['runs']}")
+        print(f"process wall time:  {summary['process_ms']:.1f} ms")
+        print(f"import main:        {summary['import_main_ms']:.1f} ms")
+        print(f"create_app():       {summary['create_app_ms']:.1f} ms")
+        print("\nslowest imports (cumulative):")
+        for module, ms in summary["slowest_imports_ms"]:
+            print(f"  {ms:8.1f} ms  {module}")
+
+    failed = False
+    if summary["eager_lazy_modules"]:
+        print(f"\nFAIL: imported at startup but should be lazy: {', '.join(summary['eager_lazy_modules'])}")
+        failed = True
+    if args.budget_ms is not None and cold_start_ms > args.budget_ms:
+        print(f"\nFAIL: cold start {cold_start_ms:.1f} ms exceeds budget of {args.budget_ms:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
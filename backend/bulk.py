@@ -0,0 +1,285 @@
+import codecs
+import csv
+import io
+import json
+import os
+from typing import AsyncIterator, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+import database
+import models
+import pagination
+import schemas
+
+
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+BULK_MAX_REPORTED_ERRORS = int(os.getenv("BULK_MAX_REPORTED_ERRORS", "1000"))
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "1000"))
+# A JSON array item that has not parsed after this many bytes is rejected
+# instead of being buffered further
+BULK_MAX_ROW_BYTES = int(os.getenv("BULK_MAX_ROW_BYTES", str(1024 * 1024)))
+
+IMPORT_FIELDS = ("title", "description", "date", "time", "image_url")
+EXPORT_FIELDS = ("id", "title", "description", "date", "time", "image_url", "created_at", "updated_at")
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def detect_format(content_type: str) -> str:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("application/x-ndjson", "application/jsonlines", "application/jsonl"):
+        return "ndjson"
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    return "json"
+
+
+async def _iter_lines(stream) -> AsyncIterator[str]:
+    # Incremental decoding: a multi-byte character may straddle two chunks
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in stream:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def _iter_csv_records(stream) -> AsyncIterator[List[str]]:
+    # A CSV record may span lines inside a quoted field; it is complete once
+    # the quotes balance ('""' escapes count twice, so parity still works).
+    pending = []
+    quotes = 0
+    async for line in _iter_lines(stream):
+        pending.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        record = "\n".join(pending)
+        pending, quotes = [], 0
+        if record.strip():
+            yield next(csv.reader([record]))
+    if pending:
+        yield next(csv.reader(["\n".join(pending)]))
+
+
+_WHITESPACE = " \t\r\n"
+_json_decoder = json.JSONDecoder()
+
+
+class _JsonArrayParser:
+    """Incremental parser for a top-level JSON array.
+
+    Only the unparsed tail is kept, so memory is bounded by the largest
+    item rather than by the body. An item that fails to parse may just be
+    incomplete; it is retried when more text arrives and is an error only
+    at the end of the body or past BULK_MAX_ROW_BYTES.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.state = "open"  # open -> first -> separator <-> item -> closed
+        self.count = 0
+
+    def feed(self, text: str, final: bool = False) -> list:
+        buffer = self.buffer + text
+        position = 0
+        items = []
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position == len(buffer):
+                break
+            char = buffer[position]
+            if self.state == "open":
+                if char != "[":
+                    raise ValueError("JSON body must be an array of events")
+                position += 1
+                self.state = "first"
+            elif self.state == "separator" or (self.state == "first" and char == "]"):
+                if char == "]":
+                    self.state = "closed"
+                elif char == ",":
+                    self.state = "item"
+                else:
+                    raise ValueError(f"Expected ',' or ']' after array item {self.count}")
+                position += 1
+            elif self.state in ("first", "item"):
+                try:
+                    item, end = _json_decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError as e:
+                    if final:
+                        raise ValueError(f"Array item {self.count + 1} is not valid JSON: {e.msg}")
+                    if len(buffer) - position > BULK_MAX_ROW_BYTES:
+                        raise ValueError(f"Array item {self.count + 1} exceeds {BULK_MAX_ROW_BYTES} bytes")
+                    break
+                if end == len(buffer) and not final:
+                    # A number may go on in the next chunk
+                    break
+                items.append(item)
+                self.count += 1
+                position = end
+                self.state = "separator"
+            else:
+                raise ValueError("Unexpected data after the JSON array")
+        self.buffer = buffer[position:]
+        if final and self.state not in ("open", "closed"):
+            raise ValueError("JSON array is not terminated")
+        return items
+
+
+async def _iter_json_array(stream) -> AsyncIterator[object]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    parser = _JsonArrayParser()
+    async for chunk in stream:
+        for item in parser.feed(decoder.decode(chunk)):
+            yield item
+    for item in parser.feed(decoder.decode(b"", final=True), final=True):
+        yield item
+
+
+async def iter_rows(request, fmt: str) -> AsyncIterator[Tuple[int, object]]:
+    """Yield (row number, raw row) pairs from a request body in the given format"""
+    if fmt == "json":
+        number = 0
+        async for item in _iter_json_array(request.stream()):
+            number += 1
+            yield number, item
+    elif fmt == "ndjson":
+        number = 0
+        async for line in _iter_lines(request.stream()):
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                yield number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, e
+    else:
+        header = None
+        number = 0
+        async for record in _iter_csv_records(request.stream()):
+            if header is None:
+                header = [name.strip() for name in record]
+                continue
+            number += 1
+            yield number, {name: (value if value != "" else None) for name, value in zip(header, record)}
+
+
+def validate_row(raw) -> dict:
+    """Validate a raw row against EventCreate and normalize it like create_event"""
+    if isinstance(raw, Exception):
+        raise ValueError(f"Invalid JSON: {raw}")
+    if not isinstance(raw, dict):
+        raise ValueError("Row must be an object")
+    event = schemas.EventCreate(**{name: raw.get(name) for name in IMPORT_FIELDS if raw.get(name) is not None})
+    title = event.title.strip()
+    if not title:
+        raise ValueError("Event title is required and cannot be empty.")
+    return {
+        "title": title,
+        "description": (event.description.strip() or None) if event.description else None,
+        "date": event.date,
+        "time": event.time,
+        "image_url": (event.image_url.strip() or None) if event.image_url else None,
+    }
+
+
+def row_errors(exc: Exception) -> list:
+    if isinstance(exc, ValidationError):
+        return exc.errors()
+    return [{"msg": str(exc)}]
+
+
+def insert_batch(db: Session, rows: List[dict]) -> int:
+    """Insert a batch as one executemany in its own transaction"""
+    try:
+        db.execute(insert(models.Event), rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(rows)
+
+
+def insert_rows(db: Session, rows: List[dict]) -> Tuple[int, List[Tuple[int, str]]]:
+    """Insert a rejected batch again one row per transaction, so each database
+    error is tied to its row. Returns the number inserted and (index, message)
+    for every row that still fails."""
+    inserted = 0
+    failures = []
+    for index, row in enumerate(rows):
+        try:
+            db.execute(insert(models.Event), [row])
+            db.commit()
+            inserted += 1
+        except DBAPIError as e:
+            db.rollback()
+            detail = str(e.orig).strip().splitlines() or [type(e.orig).__name__]
+            failures.append((index, f"Rejected by the database: {detail[0]}"))
+    return inserted, failures
+
+
+def _export_statement():
+    columns = [getattr(models.Event, name) for name in EXPORT_FIELDS]
+    return select(*columns)\
+        .order_by(*pagination.event_sort_key())\
+        .execution_options(yield_per=EXPORT_CHUNK_ROWS)
+
+
+def _record(row) -> dict:
+    record = dict(row._mapping)
+    for name in ("date", "time", "created_at", "updated_at"):
+        if record[name] is not None:
+            record[name] = record[name].isoformat()
+    return record
+
+
+def format_chunk(rows, fmt: str, header: bool = False) -> str:
+    if fmt == "ndjson":
+        return "".join(json.dumps(_record(row), separators=(",", ":")) + "\n" for row in rows)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        record = _record(row)
+        writer.writerow(["" if record[name] is None else record[name] for name in EXPORT_FIELDS])
+    return out.getvalue()
+
+
+def _export_sync(fmt: str) -> Iterator[str]:
+    with database.SessionLocal() as db:
+        result = db.execute(_export_statement())
+        if fmt == "csv":
+            yield format_chunk([], fmt, header=True)
+        for rows in result.partitions():
+            yield format_chunk(rows, fmt)
+
+
+async def _export_async(fmt: str) -> AsyncIterator[str]:
+    async with database.AsyncSessionLocal() as db:
+        result = await db.stream(_export_statement())
+        if fmt == "csv":
+            yield format_chunk([], fmt, header=True)
+        async for rows in result.partitions():
+            yield format_chunk(rows, fmt)
+
+
+def export_events(fmt: str):
+    """Stream every event through a server-side cursor, one chunk per partition.
+
+    The session is opened by the iterator itself: a request-scoped session is
+    closed before a streaming body is sent.
+    """
+    return _export_async(fmt) if database.DB_ASYNC else _export_sync(fmt)
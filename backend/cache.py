@@ -0,0 +1,188 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "60"))
+
+
+class CacheBackend:
+    """Minimal key/value interface the response cache relies on.
+
+    The operations map one-to-one onto Redis commands (GET, SET EX, DEL, INCR)
+    so a shared backend can be dropped in with ``response_cache.backend = ...``.
+    """
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    def counter(self, key: str) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class LRUCache(CacheBackend):
+    """In-process LRU cache with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters: dict = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        if self.max_entries <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        # Counters are never evicted or expired: losing one would let stale
+        # entries keyed by an older value become reachable again.
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "lru",
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class CachedResponse(NamedTuple):
+    body: str
+    etag: str
+    last_modified: Optional[str]
+
+
+class ResponseCache:
+    """Serialized event payloads keyed by event id and by list parameters.
+
+    Keys embed a generation that writes move forward after committing, so
+    a response rendered from a row read before the write can only land
+    under the old key. Each event has its own generation; list pages share
+    one, which orphans every cached page at once without having to
+    enumerate them (orphans age out through LRU/TTL). Take the key before
+    reading the data it caches.
+
+    The cache is per process: writes made by other workers are applied
+    through the change feed (see routers/events.py).
+    """
+
+    LIST_GENERATION_KEY = "events:list:generation"
+    EVENT_GENERATION_KEY = "events:generation"
+    # Part of every event key, for dropping them all at once
+    EVENT_EPOCH_KEY = "events:epoch"
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self._last_write = float("-inf")
+
+    def event_key(self, event_id: int) -> str:
+        generation = self.backend.get(f"event:{event_id}:generation")
+        if generation is None:
+            # Never reuse a number: entries of an evicted generation may live on
+            generation = self._new_event_generation(event_id)
+        return f"event:{self.backend.counter(self.EVENT_EPOCH_KEY)}:{event_id}:{generation}"
+
+    def _new_event_generation(self, event_id: int) -> str:
+        generation = str(self.backend.incr(self.EVENT_GENERATION_KEY))
+        self.backend.set(f"event:{event_id}:generation", generation)
+        return generation
+
+    def list_key(self, **params) -> str:
+        generation = self.backend.counter(self.LIST_GENERATION_KEY)
+        parts = ",".join(f"{name}={params[name]}" for name in sorted(params))
+        return f"events:list:{generation}:{parts}"
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        value = self.backend.get(key)
+        if value is None:
+            return None
+        etag, last_modified, body = value.split("\n", 2)
+        return CachedResponse(body, etag, last_modified or None)
+
+    def set(self, key: str, payload: str, etag: str, last_modified: Optional[str], ttl: Optional[float] = None) -> None:
+        # Validators ride along in the same entry so a hit can answer
+        # conditional requests without touching the database.
+        self.backend.set(key, f"{etag}\n{last_modified or ''}\n{payload}", ttl)
+
+    def invalidate_event(self, event_id: int) -> None:
+        self._new_event_generation(event_id)
+        self.invalidate_lists()
+
+    def invalidate_lists(self) -> None:
+        self._last_write = time.monotonic()
+        self.backend.incr(self.LIST_GENERATION_KEY)
+
+    def invalidate_all(self) -> None:
+        self.backend.incr(self.EVENT_EPOCH_KEY)
+        self.invalidate_lists()
+
+    def seconds_since_write(self) -> float:
+        """Time since this process last invalidated anything"""
+        return time.monotonic() - self._last_write
+
+    def stats(self) -> dict:
+        return self.backend.stats()
+
+
+response_cache = ResponseCache(LRUCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL_SECONDS))
@@ -0,0 +1,410 @@
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, List, NamedTuple, Optional, Set
+
+import orjson
+from sqlalchemy import event as sa_event, text
+from sqlalchemy.orm import Session
+
+import serialization
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+
+# "postgres" fans changes out to every worker with LISTEN/NOTIFY, "local"
+# only reaches subscribers of this process; "auto" picks by DATABASE_URL
+CHANGEFEED_BACKEND = os.getenv("CHANGEFEED_BACKEND", "auto").lower()
+CHANGEFEED_CHANNEL = os.getenv("CHANGEFEED_CHANNEL", "event_changes")
+# Recent changes kept for Last-Event-ID resume
+CHANGEFEED_HISTORY = int(os.getenv("CHANGEFEED_HISTORY", "1000"))
+# Undelivered changes per client before it is told to resync instead
+CHANGEFEED_CLIENT_BUFFER = int(os.getenv("CHANGEFEED_CLIENT_BUFFER", "100"))
+CHANGEFEED_MAX_SUBSCRIBERS = int(os.getenv("CHANGEFEED_MAX_SUBSCRIBERS", "50000"))
+CHANGEFEED_PING_SECONDS = float(os.getenv("CHANGEFEED_PING_SECONDS", "15"))
+CHANGEFEED_RETRY_MS = int(os.getenv("CHANGEFEED_RETRY_MS", "3000"))
+
+# NOTIFY payloads are limited to 8000 bytes; larger changes go out without the event body
+MAX_NOTIFY_PAYLOAD = 7900
+_PENDING = "changefeed.pending"
+
+
+def _use_postgres() -> bool:
+    if CHANGEFEED_BACKEND == "auto":
+        return engine.url.get_backend_name() == "postgresql"
+    return CHANGEFEED_BACKEND == "postgres"
+
+
+class Change(NamedTuple):
+    id: str
+    type: str
+    data: str  # the JSON document sent to clients, encoded once
+
+
+# Markers yielded by ChangeHub.listen next to Change items
+RESET = "reset"  # changes were lost; the client must refetch
+PING = "ping"
+
+
+_sequence = itertools.count(1)
+
+
+def _payload(kind: str, event_id: Optional[int], event=None, **extra) -> str:
+    # Ids only have to be unique: resume looks them up in the history, whose
+    # order is the commit (or NOTIFY delivery) order, the same in every worker
+    change = {"id": f"{time.time_ns() // 1000:x}-{os.getpid():x}-{next(_sequence)}", "type": kind, "event_id": event_id}
+    change.update(extra)
+    if event is not None:
+        change["event"] = serialization.event_dict(event)
+        payload = serialization.dumps(change)
+        if len(payload.encode()) <= MAX_NOTIFY_PAYLOAD:
+            return payload
+        del change["event"]
+    return serialization.dumps(change)
+
+
+def notify(db: Session, kind: str, event_id: Optional[int], event=None, **extra) -> None:
+    """Announce a change as part of ``db``'s current transaction.
+
+    Subscribers only see it once the transaction commits: NOTIFY is
+    transactional in PostgreSQL, and the local backend holds it back until
+    the session's after_commit hook.
+    """
+    payload = _payload(kind, event_id, event, **extra)
+    if _use_postgres():
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANGEFEED_CHANNEL, "payload": payload})
+    else:
+        db.info.setdefault(_PENDING, []).append(payload)
+
+
+def publish(db: Session, kind: str, event_id: Optional[int] = None, **extra) -> None:
+    """notify() in a transaction of its own, for writes that are already committed"""
+    notify(db, kind, event_id, **extra)
+    db.commit()
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _send_pending(session: Session) -> None:
+    for payload in session.info.pop(_PENDING, ()):
+        hub.receive_threadsafe(payload)
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+class Subscriber:
+    """One connected client: a bounded buffer and a wakeup flag, no task of its own"""
+
+    __slots__ = ("buffer", "wakeup", "overflowed", "ping", "closed")
+
+    def __init__(self):
+        self.buffer: Deque[Change] = deque()
+        self.wakeup = asyncio.Event()
+        self.overflowed = False
+        self.ping = False
+        self.closed = False
+
+    def push(self, change: Change, limit: int) -> bool:
+        """Queue ``change``; False if the buffer overflowed and was dropped"""
+        self.wakeup.set()
+        if len(self.buffer) >= limit:
+            # A client this far behind resyncs from the API instead
+            self.buffer.clear()
+            self.overflowed = True
+            return False
+        self.buffer.append(change)
+        return True
+
+
+class ChangeHub:
+    """Fans event changes out to the subscribers of this process.
+
+    Changes arrive from the write handlers (local backend) or from a
+    LISTEN connection (postgres backend). Everything except
+    receive_threadsafe runs on the event loop thread.
+
+    Watchers are called with every change's decoded document, and with None
+    when changes may have been missed; per-process caches use them to drop
+    what other workers' writes made stale.
+    """
+
+    def __init__(self, history: int, client_buffer: int, max_subscribers: int):
+        self.client_buffer = client_buffer
+        self.max_subscribers = max_subscribers
+        self.history: Deque[Change] = deque(maxlen=history)
+        self.subscribers: Set[Subscriber] = set()
+        self.received = 0
+        self.overflows = 0
+        self.resets = 0
+        self.draining = False
+        self.watchers: List[Callable[[Optional[dict]], None]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._listener: Optional["PostgresListener"] = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self.draining = False
+        self._heartbeat = asyncio.create_task(self._ping_forever())
+        if _use_postgres():
+            self._listener = PostgresListener(self, CHANGEFEED_CHANNEL)
+            await self._listener.start()
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        self.close_streams()
+        self._loop = None
+
+    def close_streams(self) -> None:
+        """End every open stream, e.g. when the server starts draining.
+
+        Clients reconnect (to another worker) and resume from their last id;
+        streams opened from now on end right away.
+        """
+        self.draining = True
+        for subscriber in self.subscribers:
+            subscriber.closed = True
+            subscriber.wakeup.set()
+
+    def drain(self) -> None:
+        """close_streams() from a signal handler or another thread"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self.close_streams)
+
+    def receive_threadsafe(self, payload: str) -> None:
+        """Hand a payload from any thread to the loop; dropped when not started"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self.receive, payload)
+
+    def watch(self, callback: Callable[[Optional[dict]], None]) -> None:
+        self.watchers.append(callback)
+
+    def _notify_watchers(self, data: Optional[dict]) -> None:
+        for callback in self.watchers:
+            try:
+                callback(data)
+            except Exception as e:
+                logger.error("Change feed watcher failed: %s", e)
+
+    def receive(self, payload: str) -> None:
+        try:
+            data = orjson.loads(payload)
+            change = Change(data["id"], data["type"], payload)
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed change notification: %.200s", payload)
+            return
+        self._notify_watchers(data)
+        self.received += 1
+        self.history.append(change)
+        for subscriber in self.subscribers:
+            if not subscriber.push(change, self.client_buffer):
+                self.overflows += 1
+
+    def reset(self) -> None:
+        """Changes may have been missed (e.g. LISTEN reconnect): make everyone resync"""
+        self.resets += 1
+        self._notify_watchers(None)
+        self.history.clear()
+        for subscriber in self.subscribers:
+            subscriber.buffer.clear()
+            subscriber.overflowed = True
+            subscriber.wakeup.set()
+
+    def since(self, last_id: str) -> Optional[List[Change]]:
+        """Changes after ``last_id``, or None if it is no longer in the history"""
+        changes = list(self.history)
+        for index in range(len(changes) - 1, -1, -1):
+            if changes[index].id == last_id:
+                return changes[index + 1:]
+        return None
+
+    @property
+    def full(self) -> bool:
+        return len(self.subscribers) >= self.max_subscribers
+
+    def subscribe(self, last_id: Optional[str] = None) -> Subscriber:
+        subscriber = Subscriber()
+        subscriber.closed = self.draining
+        if last_id:
+            missed = self.since(last_id)
+            if missed is None or len(missed) > self.client_buffer:
+                subscriber.overflowed = True
+            else:
+                subscriber.buffer.extend(missed)
+            if subscriber.overflowed or subscriber.buffer:
+                subscriber.wakeup.set()
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self.subscribers.discard(subscriber)
+
+    async def listen(self, last_id: Optional[str] = None) -> AsyncIterator[list]:
+        """Subscribe and yield batches of Change items and RESET/PING markers
+        until the hub stops; unsubscribes when the consumer goes away.
+        """
+        subscriber = self.subscribe(last_id)
+        try:
+            while not subscriber.closed:
+                await subscriber.wakeup.wait()
+                subscriber.wakeup.clear()
+                batch: list = []
+                if subscriber.overflowed:
+                    subscriber.overflowed = False
+                    batch.append(RESET)
+                while subscriber.buffer:
+                    batch.append(subscriber.buffer.popleft())
+                if subscriber.ping and not batch:
+                    batch.append(PING)
+                subscriber.ping = False
+                if batch:
+                    yield batch
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def _ping_forever(self) -> None:
+        # One timer for all subscribers rather than a timeout per stream
+        while True:
+            await asyncio.sleep(CHANGEFEED_PING_SECONDS)
+            for subscriber in self.subscribers:
+                subscriber.ping = True
+                subscriber.wakeup.set()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "postgres" if _use_postgres() else "local",
+            "subscribers": len(self.subscribers),
+            "history": len(self.history),
+            "received": self.received,
+            "overflows": self.overflows,
+            "resets": self.resets,
+            "listening": self._listener.connected if self._listener is not None else None,
+        }
+
+
+class PostgresListener:
+    """LISTENs on a dedicated psycopg2 connection watched by the event loop.
+
+    The connection is outside the pool and costs no thread: the loop polls
+    it when the socket becomes readable. After a lost connection the hub is
+    reset, since NOTIFYs sent in the meantime are gone.
+    """
+
+    def __init__(self, hub: ChangeHub, channel: str):
+        self.hub = hub
+        self.channel = channel
+        self.connection = None
+        self._reconnect: Optional[asyncio.Task] = None
+        self._stopped = False
+
+    @property
+    def connected(self) -> bool:
+        return self.connection is not None
+
+    def _connect(self):
+        dialect = engine.dialect
+        if dialect.driver != "psycopg2":
+            raise RuntimeError(f"LISTEN needs the psycopg2 driver, not {dialect.driver}")
+        cargs, cparams = dialect.create_connect_args(engine.url)
+        connection = dialect.loaded_dbapi.connect(*cargs, **cparams)
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute('LISTEN "%s"' % self.channel.replace('"', '""'))
+        return connection
+
+    async def start(self) -> None:
+        try:
+            await self._attach()
+        except Exception as e:
+            logger.warning("Change feed LISTEN failed, retrying in the background: %s", e)
+            self._reconnect = asyncio.create_task(self._reconnect_forever())
+
+    async def _attach(self) -> None:
+        loop = asyncio.get_running_loop()
+        self.connection = await loop.run_in_executor(None, self._connect)
+        loop.add_reader(self.connection.fileno(), self._on_readable)
+        logger.info("Change feed listening on channel %s", self.channel)
+
+    def _on_readable(self) -> None:
+        try:
+            self.connection.poll()
+        except Exception as e:
+            logger.warning("Change feed LISTEN connection lost: %s", e)
+            self._detach()
+            self.hub.reset()
+            if not self._stopped:
+                self._reconnect = asyncio.get_running_loop().create_task(self._reconnect_forever())
+            return
+        notifies = self.connection.notifies
+        while notifies:
+            self.hub.receive(notifies.pop(0).payload)
+
+    async def _reconnect_forever(self) -> None:
+        delay = 1.0
+        while not self._stopped:
+            await asyncio.sleep(delay)
+            try:
+                await self._attach()
+                self.hub.reset()
+                return
+            except Exception as e:
+                logger.warning("Change feed LISTEN reconnect failed: %s", e)
+                delay = min(delay * 2, 30.0)
+
+    def _detach(self) -> None:
+        if self.connection is None:
+            return
+        try:
+            asyncio.get_running_loop().remove_reader(self.connection.fileno())
+        except Exception:
+            pass
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+        self.connection = None
+
+    def stop(self) -> None:
+        self._stopped = True
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+            self._reconnect = None
+        self._detach()
+
+
+hub = ChangeHub(CHANGEFEED_HISTORY, CHANGEFEED_CLIENT_BUFFER, CHANGEFEED_MAX_SUBSCRIBERS)
+
+
+def message(item) -> str:
+    """JSON text of a Change or marker, as sent over the WebSocket"""
+    if item is RESET:
+        return '{"type":"reset"}'
+    if item is PING:
+        return '{"type":"ping"}'
+    return item.data
+
+
+async def sse_frames(last_id: Optional[str] = None) -> AsyncIterator[str]:
+    """text/event-stream body for one client"""
+    yield f"retry: {CHANGEFEED_RETRY_MS}\n\n"
+    async for batch in hub.listen(last_id):
+        frames = []
+        for item in batch:
+            if item is PING:
+                frames.append(": ping\n\n")
+            elif item is RESET:
+                frames.append(f"event: reset\ndata: {message(item)}\n\n")
+            else:
+                frames.append(f"id: {item.id}\nevent: {item.type}\ndata: {item.data}\n\n")
+        yield "".join(frames)
@@ -1,6 +1,10 @@
 import os
+import time
 import cloudinary
 import cloudinary.uploader
+import cloudinary.utils
+
+import images
 
 CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
 API_KEY = os.getenv("CLOUDINARY_API_KEY")
@@ -19,12 +23,40 @@ cloudinary.config(
 )
 
 
+FOLDER = "event-management"
+# Cloudinary refuses signed requests whose timestamp is older than an hour
+SIGNATURE_MAX_AGE_SECONDS = 3600
+
+
 def upload_image(file_content, public_id=None):
     """Upload image to Cloudinary and return URL"""
     result = cloudinary.uploader.upload(
         file_content,
         public_id=public_id,
-        folder="event-management",
+        folder=FOLDER,
         resource_type="image",
+        eager=images.eager_transformations(),
+        eager_async=True,
     )
     return result["secure_url"]
+
+
+def sign_upload(public_id=None):
+    """Signed form fields for uploading straight from the client to Cloudinary"""
+    timestamp = int(time.time())
+    params = {
+        "timestamp": timestamp,
+        "folder": FOLDER,
+        "eager": images.eager_transformations(),
+        "eager_async": "true",
+    }
+    if public_id:
+        params["public_id"] = public_id
+    signature = cloudinary.utils.api_sign_request(params, API_SECRET)
+    return {
+        "method": "POST",
+        "upload_url": f"https://api.cloudinary.com/v1_1/{CLOUD_NAME}/image/upload",
+        "fields": {**params, "api_key": API_KEY, "signature": signature},
+        "headers": {},
+        "expires_at": timestamp + SIGNATURE_MAX_AGE_SECONDS,
+    }
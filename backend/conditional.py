@@ -0,0 +1,75 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive timestamps; they are stored as UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _strong_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def event_etag(body: str) -> str:
+    # A digest of the representation itself: updated_at has one-second
+    # resolution on SQLite, so two edits within a second would share it
+    return _strong_etag("event", body)
+
+
+def list_etag(revision: int, **params) -> str:
+    # Neither max(updated_at) nor a (cached) count is exact: a delete moves
+    # neither, and two edits can share a timestamp second
+    parts = [f"{name}={params[name]}" for name in sorted(params)]
+    return _strong_etag("events", revision, *parts)
+
+
+def content_etag(body: str) -> str:
+    return _strong_etag("content", body)
+
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    return format_datetime(_as_utc(value).replace(microsecond=0), usegmt=True)
+
+
+def validator_headers(etag: str, last_modified: Optional[str]) -> dict:
+    headers = {"ETag": etag}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[str]) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since as RFC 9110 prescribes for GET"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def json_response(body: str, etag: str, last_modified: Optional[str], status_code: int = status.HTTP_200_OK) -> Response:
+    return Response(
+        content=body, status_code=status_code, media_type="application/json",
+        headers=validator_headers(etag, last_modified)
+    )
+
+
+def not_modified(etag: str, last_modified: Optional[str]) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(etag, last_modified))
@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+import logging
+from typing import Optional
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+import models
+
+logger = logging.getLogger(__name__)
+
+
+COUNT_MODE = os.getenv("EVENT_COUNT_MODE", "cached")
+COUNT_TTL_SECONDS = float(os.getenv("EVENT_COUNT_TTL_SECONDS", "30"))
+
+
+class CountProvider:
+    """Row count for a table, served from a per-process cache.
+
+    Modes:
+      * ``exact``    - run COUNT(*) on every call
+      * ``cached``   - run COUNT(*) at most once per TTL or after invalidate()
+      * ``estimate`` - read ``pg_class.reltuples`` (PostgreSQL only; falls back
+                       to COUNT(*) on other databases or never-analyzed tables)
+    """
+
+    def __init__(self, model, mode: str = "cached", ttl: float = 30.0):
+        if mode not in ("exact", "cached", "estimate"):
+            raise ValueError(f"Unknown count mode: {mode}")
+        self.model = model
+        self.mode = mode
+        self.ttl = ttl
+        self._value: Optional[int] = None
+        self._expires_at = 0.0
+        # Moved forward by invalidate(), so a count taken before a write is
+        # not stored after it
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> int:
+        if self.mode == "exact":
+            return self._exact(db)
+
+        with self._lock:
+            value = self._value
+            if value is not None and time.monotonic() < self._expires_at:
+                return value
+            generation = self._generation
+
+        value = self._estimate(db) if self.mode == "estimate" else None
+        if value is None:
+            value = self._exact(db)
+
+        with self._lock:
+            if self._generation == generation:
+                self._value = value
+                self._expires_at = time.monotonic() + self.ttl
+        return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._value = None
+            self._expires_at = 0.0
+
+    def _exact(self, db: Session) -> int:
+        return db.query(func.count(self.model.id)).scalar()
+
+    def _estimate(self, db: Session) -> Optional[int]:
+        if db.get_bind().dialect.name != "postgresql":
+            return None
+        try:
+            estimate = db.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+                {"table": self.model.__tablename__},
+            ).scalar()
+        except Exception as e:
+            db.rollback()
+            logger.warning("Row estimate unavailable for %s: %s", self.model.__tablename__, e)
+            return None
+        if estimate is None or estimate < 0:
+            return None
+        return int(estimate)
+
+
+event_counts = CountProvider(models.Event, mode=COUNT_MODE, ttl=COUNT_TTL_SECONDS)
@@ -1,27 +1,120 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.concurrency import run_in_threadpool
 import os
 
+from pool_stats import InstrumentedQueuePool, InstrumentedAsyncQueuePool
+
 
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
     "postgresql+psycopg2://postgres:postgres@db:5432/events",
 )
 
+# Opt-in asyncio request path (AsyncEngine + asyncpg instead of psycopg2 in
+# Starlette's threadpool).
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+
+def _async_url(url: str) -> str:
+    for sync_prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Behind an external pooler (pgbouncer) keep no connections of our own
+DB_NULL_POOL = os.getenv("DB_NULL_POOL", "false").lower() in ("1", "true", "yes")
+
+
+def _engine_options(url: str, async_mode: bool = False) -> dict:
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return {}
+    if DB_NULL_POOL:
+        options = {"poolclass": NullPool}
+        if url.get_driver_name() == "asyncpg":
+            # pgbouncer in transaction mode cannot keep prepared statements
+            options["connect_args"] = {"statement_cache_size": 0}
+        return options
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if async_mode else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
 
-engine = create_engine(DATABASE_URL, echo=False, future=True)
+
+engine = create_engine(DATABASE_URL, echo=False, future=True, **_engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 
+if DB_ASYNC:
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False, **_engine_options(ASYNC_DATABASE_URL, async_mode=True))
+    # Handlers hand ORM objects back to FastAPI for serialization outside the
+    # session's greenlet, so they must not expire (and lazy-load) on commit.
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+else:
+    async_engine = None
+    AsyncSessionLocal = None
+
 
 class Base(DeclarativeBase):
     pass
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+if DB_ASYNC:
+    async def get_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+else:
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+async def run_db(db, fn, *args, **kwargs):
+    """Run ``fn(session, *args, **kwargs)`` without blocking the event loop.
+
+    ``fn`` is written against the regular synchronous Session API. With an
+    AsyncSession it runs through ``run_sync`` (asyncpg I/O is awaited under
+    the hood); with a plain Session it is sent to the threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+async def run_session(fn, *args, **kwargs):
+    """Like run_db, but in a short-lived session of its own.
+
+    For callers that only occasionally need the database (e.g. auth cache
+    misses) and should not hold a request-scoped session for it.
+    """
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as db:
+            return await db.run_sync(fn, *args, **kwargs)
 
+    def call():
+        with SessionLocal() as db:
+            return fn(db, *args, **kwargs)
 
+    return await run_in_threadpool(call)
@@ -1,14 +1,27 @@
 import logging
-from fastapi import Depends, HTTPException, status
+import os
+from typing import NamedTuple, Optional
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
-from database import get_db
+from database import run_session
+from replicas import run_read_session
 from models import User
 from auth import decode_access_token
+from cache import LRUCache
+from revocation import token_denylist
 
 logger = logging.getLogger(__name__)
 
+# "database": identity is re-read from the users table (through a short TTL
+# cache). "claims": identity and role are trusted from the signed token, with
+# no database round trip. Revocation is checked in memory either way.
+AUTH_MODE = os.getenv("AUTH_MODE", "database")
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="/api/v1/auth/login",
     scheme_name="JWT",
@@ -16,7 +29,48 @@ oauth2_scheme = OAuth2PasswordBearer(
 )
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+class CurrentUser(NamedTuple):
+    """Detached snapshot of the authenticated user, safe to cache and share"""
+    id: int
+    name: str
+    email: str
+    role: str
+
+
+user_cache = LRUCache(USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS)
+
+
+def _get_user(db: Session, user_id: int):
+    user = db.get(User, user_id)
+    if user is None:
+        return None
+    return CurrentUser(user.id, user.name, user.email, user.role)
+
+
+async def _resolve_user(payload: dict, user_id: int, request: Optional[Request] = None):
+    if AUTH_MODE == "claims" and payload.get("email") and payload.get("role"):
+        return CurrentUser(user_id, payload.get("name", ""), payload["email"], payload["role"])
+    user = user_cache.get(user_id)
+    if user is None:
+        if request is not None:
+            user = await run_read_session(request, _get_user, user_id)
+        else:
+            user = await run_session(_get_user, user_id)
+        if user is not None:
+            user_cache.set(user_id, user)
+    return user
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> CurrentUser:
+    return await _authenticate(token)
+
+
+async def get_current_reader(request: Request, token: str = Depends(oauth2_scheme)) -> CurrentUser:
+    """get_current_user for read-only endpoints: a user cache miss may be served by a replica"""
+    return await _authenticate(token, request)
+
+
+async def _authenticate(token: str, request: Optional[Request] = None) -> CurrentUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid authentication credentials. Please log in again.",
@@ -44,26 +98,29 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         logger.warning("Invalid user ID format in token")
         raise credentials_exception
     except Exception as e:
-        logger.warning(f"Token validation error: {str(e)}")
+        logger.warning("Token validation error: %s", e)
         raise credentials_exception
 
-    user = db.get(User, user_id)
+    if token_denylist.is_revoked(payload, user_id):
+        logger.warning("Revoked token presented for user ID: %s", user_id)
+        raise credentials_exception
+
+    user = await _resolve_user(payload, user_id, request)
     if not user:
-        logger.warning(f"User not found for ID: {user_id}")
+        logger.warning("User not found for ID: %s", user_id)
         raise credentials_exception
         
-    logger.info(f"User authenticated: {user.email} (ID: {user.id})")
+    logger.debug("User authenticated: %s (ID: %s)", user.email, user.id)
     return user
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+async def require_admin(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     if current_user.role != "admin":
-        logger.warning(f"Admin access denied for user: {current_user.email} (role: {current_user.role})")
+        logger.warning("Admin access denied for user: %s (role: %s)", current_user.email, current_user.role)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, 
             detail="Admin privileges required. You don't have permission to access this resource."
         )
     
-    logger.info(f"Admin access granted to: {current_user.email}")
+    logger.debug("Admin access granted to: %s", current_user.email)
     return current_user
-
@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+
+import auth
+
+logger = logging.getLogger(__name__)
+
+
+# bcrypt releases the GIL while hashing, so plain threads give real
+# parallelism; the pool is kept separate from Starlette's threadpool so a
+# login storm cannot starve other endpoints.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", "32"))
+HASH_RETRY_AFTER_SECONDS = os.getenv("HASH_RETRY_AFTER_SECONDS", "1")
+
+
+class PasswordHasher:
+    """Runs password hashing on a bounded worker pool.
+
+    At most ``workers`` hashes run at once and at most ``queue_size`` more
+    wait for a worker; anything beyond that is rejected with 429 instead of
+    piling up. Only called from the event loop, so the counter needs no lock.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.max_pending = workers + queue_size
+        self.pending = 0
+        self.rejected = 0
+        self._executor = None
+
+    async def _submit(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            logger.warning("Password hashing pool saturated (%s pending)", self.pending)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many authentication requests. Please retry shortly.",
+                headers={"Retry-After": HASH_RETRY_AFTER_SECONDS},
+            )
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self.pending += 1
+        try:
+            return await asyncio.wrap_future(self._executor.submit(fn, *args))
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(auth.get_password_hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str):
+        return await self._submit(auth.verify_and_update_password, password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(HASH_WORKERS, HASH_QUEUE_SIZE)
@@ -0,0 +1,285 @@
+import asyncio
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from storage import LOCAL_STORAGE_DIR, LOCAL_STORAGE_URL
+
+logger = logging.getLogger(__name__)
+
+
+# "webp" or "avif"; AVIF falls back to WebP when Pillow lacks an encoder
+IMAGE_VARIANT_FORMAT = os.getenv("IMAGE_VARIANT_FORMAT", "webp").lower()
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+IMAGE_VARIANT_URL = os.getenv("IMAGE_VARIANT_URL", "/api/v1/images")
+DERIVATIVE_CACHE_DIR = os.getenv("DERIVATIVE_CACHE_DIR", "derivatives")
+DERIVATIVE_CACHE_MAX_BYTES = int(os.getenv("DERIVATIVE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+CLOUDINARY_UPLOAD_PATH = "/image/upload/"
+
+
+class Variant(NamedTuple):
+    width: int
+    height: int
+    crop: bool  # True: fill the box and crop; False: fit inside it, never upscale
+
+
+VARIANTS: Dict[str, Variant] = {
+    "thumb": Variant(160, 160, True),
+    "card": Variant(480, 320, True),
+    "full": Variant(1600, 1200, False),
+}
+
+
+def cloudinary_transformation(variant: Variant, fmt: str = IMAGE_VARIANT_FORMAT) -> str:
+    crop = "fill" if variant.crop else "limit"
+    return f"c_{crop},w_{variant.width},h_{variant.height},q_auto,f_{fmt}"
+
+
+def eager_transformations() -> str:
+    """Cloudinary ``eager`` value that renders every variant at upload time"""
+    return "|".join(cloudinary_transformation(variant) for variant in VARIANTS.values())
+
+
+def variant_urls(image_url: Optional[str]) -> Optional[Dict[str, str]]:
+    """Map variant name to URL for images we store; None for foreign URLs"""
+    if not image_url:
+        return None
+    if "res.cloudinary.com" in image_url and CLOUDINARY_UPLOAD_PATH in image_url:
+        # Same transformation strings as the eager ones, so Cloudinary
+        # serves the derivatives rendered at upload time
+        return {
+            name: image_url.replace(
+                CLOUDINARY_UPLOAD_PATH, f"{CLOUDINARY_UPLOAD_PATH}{cloudinary_transformation(variant)}/", 1
+            )
+            for name, variant in VARIANTS.items()
+        }
+    local_prefix = f"{LOCAL_STORAGE_URL.rstrip('/')}/"
+    if image_url.startswith(local_prefix):
+        public_id = image_url[len(local_prefix):]
+        return {name: f"{IMAGE_VARIANT_URL}/{name}/{public_id}" for name in VARIANTS}
+    return None
+
+
+def output_format() -> str:
+    if IMAGE_VARIANT_FORMAT == "avif":
+        from PIL import features
+        if not features.check("avif"):
+            logger.warning("Pillow has no AVIF encoder, rendering variants as WebP")
+            return "webp"
+    return IMAGE_VARIANT_FORMAT
+
+
+def render_variant(source_path: str, variant: Variant, fmt: str) -> bytes:
+    # Pillow is imported here so that importing schemas stays cheap
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as original:
+        # Let the JPEG decoder downscale by a power of two while decoding
+        original.draft("RGB", (variant.width * 2, variant.height * 2))
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or "A" in image.getbands() else "RGB")
+        size = (variant.width, variant.height)
+        if variant.crop:
+            image = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+        else:
+            image.thumbnail(size, Image.Resampling.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, format=fmt.upper(), quality=IMAGE_QUALITY)
+        return out.getvalue()
+
+
+class DerivativeCache:
+    """Rendered variants on local disk, evicted least recently used first
+    once their total size exceeds ``max_bytes``.
+
+    Recency is tracked in memory and seeded from file modification times
+    the first time the cache is used, so a restart keeps the warm set.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._bytes = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def _load(self) -> None:
+        found = []
+        for root, _dirs, files in os.walk(self.directory):
+            for filename in files:
+                if filename.endswith(".part"):
+                    continue
+                full = os.path.join(root, filename)
+                stat = os.stat(full)
+                found.append((stat.st_mtime, os.path.relpath(full, self.directory), stat.st_size))
+        for _mtime, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+        self._loaded = True
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if key in self._entries:
+                path = self.path(key)
+                if os.path.exists(path):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return path
+                self._bytes -= self._entries.pop(key)
+            self.misses += 1
+            return None
+
+    def put(self, key: str, data: bytes) -> str:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = f"{path}.{threading.get_ident()}.part"
+        with open(partial, "wb") as target:
+            target.write(data)
+        os.replace(partial, path)
+
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._bytes -= self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                victim, size = self._entries.popitem(last=False)
+                self._bytes -= size
+                self.evictions += 1
+                try:
+                    os.remove(self.path(victim))
+                except FileNotFoundError:
+                    pass
+        return path
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class ImagePipeline:
+    """Renders variants of locally stored images on a dedicated worker pool.
+
+    Variants are rendered eagerly after an upload and on demand when a
+    variant is requested but missing from the derivative cache. Concurrent
+    requests for the same variant share one render.
+    """
+
+    def __init__(self, workers: int, cache: DerivativeCache, source_dir: str = LOCAL_STORAGE_DIR):
+        self.workers = workers
+        self.cache = cache
+        self.source_dir = source_dir
+        self.rendered = 0
+        self.failed = 0
+        self._format = None
+        self._executor = None
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def format(self) -> str:
+        if self._format is None:
+            self._format = output_format()
+        return self._format
+
+    def source_path(self, public_id: str) -> str:
+        return os.path.join(self.source_dir, os.path.basename(public_id))
+
+    def key(self, public_id: str, name: str) -> str:
+        stem = os.path.splitext(os.path.basename(public_id))[0]
+        return f"{name}/{stem}.{self.format}"
+
+    def _render(self, public_id: str, name: str, key: str) -> str:
+        try:
+            data = render_variant(self.source_path(public_id), VARIANTS[name], self.format)
+        except Exception:
+            self.failed += 1
+            raise
+        self.rendered += 1
+        return self.cache.put(key, data)
+
+    def _submit(self, public_id: str, name: str) -> Future:
+        key = self.key(public_id, name)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="image-variant")
+                future = self._executor.submit(self._render, public_id, name, key)
+                self._inflight[key] = future
+                future.add_done_callback(lambda _: self._done(key))
+        return future
+
+    def _done(self, key: str) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def schedule(self, public_id: str) -> None:
+        """Render every variant in the background, e.g. right after an upload"""
+        for name in VARIANTS:
+            self._submit(public_id, name).add_done_callback(_log_failure)
+
+    def _find(self, public_id: str, name: str) -> Tuple[Optional[str], bool]:
+        """Cached variant path (if any) and whether the source image exists"""
+        path = self.cache.get(self.key(public_id, name))
+        return path, path is not None or os.path.exists(self.source_path(public_id))
+
+    async def variant_path(self, public_id: str, name: str) -> Optional[str]:
+        """Path of the rendered variant, rendering it first if needed"""
+        # The first lookup walks the cache directory; every one stats files
+        path, source_exists = await run_in_threadpool(self._find, public_id, name)
+        if path is not None:
+            return path
+        if not source_exists:
+            return None
+        return await asyncio.wrap_future(self._submit(public_id, name))
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "format": self.format,
+            "in_flight": len(self._inflight),
+            "rendered": self.rendered,
+            "failed": self.failed,
+            "cache": self.cache.stats(),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def _log_failure(future: Future) -> None:
+    exc = future.exception()
+    if exc is not None:
+        logger.warning("Background image variant rendering failed: %s", exc)
+
+
+image_pipeline = ImagePipeline(IMAGE_WORKERS, DerivativeCache(DERIVATIVE_CACHE_DIR, DERIVATIVE_CACHE_MAX_BYTES))
@@ -1,28 +1,57 @@
 import os
-import time
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from fastapi.exceptions import RequestValidationError
+from starlette.concurrency import run_in_threadpool
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from database import Base, engine
-from models import User, Event
-from routers import users, events, upload
-
-logging.basicConfig(level=logging.INFO)
+from database import engine, async_engine
+from routers import users, events, upload, images, admin
+from hashing import password_hasher
+from images import image_pipeline
+from storage import STORAGE_BACKEND, MediaFiles, get_storage
+from schema_version import check_schema_version
+from logging_config import configure_logging
+import changefeed
+import metrics
+from metrics import METRICS_ENABLED, MetricsMiddleware, instrument_engine
+from ratelimit import RATE_LIMIT_ENABLED, RateLimitMiddleware
+from replicas import STICKY_HEADER, ReadYourWritesMiddleware, replica_set
+from revocation import token_denylist
+
+configure_logging()
 logger = logging.getLogger(__name__)
 
+if METRICS_ENABLED:
+    instrument_engine(engine)
+    if async_engine is not None:
+        instrument_engine(async_engine)
+    for replica in replica_set.replicas:
+        instrument_engine(replica.async_engine or replica.engine, track_pool=False)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting Event Management System API")
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created successfully")
+    # Migrations are applied once per deploy by migrate.py; workers only
+    # confirm the database is new enough
+    await run_in_threadpool(check_schema_version, engine)
+    await changefeed.hub.start()
+    await replica_set.start()
+    await token_denylist.start()
     yield
     logger.info("Shutting down Event Management System API")
+    await changefeed.hub.stop()
+    await replica_set.stop()
+    await token_denylist.stop()
+    password_hasher.shutdown()
+    image_pipeline.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
 
 def create_app() -> FastAPI:
     app = FastAPI(
@@ -38,11 +67,19 @@ def create_app() -> FastAPI:
             "url": "https://opensource.org/licenses/MIT",
         },
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
         docs_url="/docs",
         redoc_url="/redoc",
         openapi_url="/openapi.json"
     )
 
+    if replica_set.replicas:
+        app.add_middleware(ReadYourWritesMiddleware)
+
+    if RATE_LIMIT_ENABLED:
+        # Inside CORS so rejections still carry CORS headers for browsers
+        app.add_middleware(RateLimitMiddleware)
+
     cors_origins = os.getenv("CORS_ORIGINS", "*")
     allow_origins = [o.strip() for o in cors_origins.split(",") if o.strip()] if cors_origins else ["*"]
 
@@ -50,8 +87,9 @@ def create_app() -> FastAPI:
         CORSMiddleware,
         allow_origins=allow_origins,
         allow_credentials=True,
-        allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
         allow_headers=["*"],
+        expose_headers=[STICKY_HEADER],
     )
 
     trusted_hosts = os.getenv("TRUSTED_HOSTS", "*").split(",")
@@ -60,22 +98,13 @@ def create_app() -> FastAPI:
         allowed_hosts=trusted_hosts
     )
 
-    @app.middleware("http")
-    async def log_requests(request: Request, call_next):
-        start_time = time.time()
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        
-        logger.info(
-            f"{request.method} {request.url.path} - "
-            f"Status: {response.status_code} - "
-            f"Time: {process_time:.4f}s"
-        )
-        return response
+    if METRICS_ENABLED:
+        # Outermost, so the latency includes every other middleware
+        app.add_middleware(MetricsMiddleware)
 
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(request: Request, exc: RequestValidationError):
-        logger.warning(f"Validation error on {request.url.path}: {exc.errors()}")
+        logger.warning("Validation error on %s: %s", request.url.path, exc.errors())
         return JSONResponse(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             content={
@@ -87,18 +116,19 @@ def create_app() -> FastAPI:
 
     @app.exception_handler(StarletteHTTPException)
     async def http_exception_handler(request: Request, exc: StarletteHTTPException):
-        logger.warning(f"HTTP error on {request.url.path}: {exc.detail}")
+        logger.warning("HTTP error on %s: %s", request.url.path, exc.detail)
         return JSONResponse(
             status_code=exc.status_code,
             content={
                 "detail": exc.detail,
                 "status_code": exc.status_code
-            }
+            },
+            headers=getattr(exc, "headers", None)
         )
 
     @app.exception_handler(Exception)
     async def general_exception_handler(request: Request, exc: Exception):
-        logger.error(f"Unexpected error on {request.url.path}: {str(exc)}")
+        logger.error("Unexpected error on %s: %s", request.url.path, exc)
         return JSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={
@@ -110,6 +140,12 @@ def create_app() -> FastAPI:
     app.include_router(users.router, prefix="/api/v1")
     app.include_router(events.router, prefix="/api/v1")
     app.include_router(upload.router, prefix="/api/v1")
+    app.include_router(images.router, prefix="/api/v1")
+    app.include_router(admin.router, prefix="/api/v1")
+
+    if STORAGE_BACKEND == "local":
+        storage = get_storage()
+        app.mount(storage.base_url, MediaFiles(directory=storage.directory), name="media")
 
     @app.get("/health", tags=["health"])
     async def health_check():
@@ -119,6 +155,11 @@ def create_app() -> FastAPI:
             "version": "1.0.0"
         }
 
+    if METRICS_ENABLED:
+        @app.get("/metrics", tags=["health"], include_in_schema=False)
+        async def metrics_endpoint():
+            return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
     @app.get("/", tags=["root"])
     async def root():
         return {
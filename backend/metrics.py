@@ -0,0 +1,278 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from sqlalchemy import event
+
+from pool_stats import pool_status, wait_stats
+
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Requests that matched no route share one label so that scanners probing
+# random URLs cannot blow up the number of series
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Sharded:
+    """Per-thread partial values, merged when scraped.
+
+    Writers only touch their own thread's dict, so recording a sample takes
+    no lock. The lock is taken once per thread, when its shard is created.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def _snapshots(self):
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            yield list(shard.items())
+
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1.0) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def collect(self) -> Dict[tuple, float]:
+        merged: Dict[tuple, float] = {}
+        for items in self._snapshots():
+            for labels, value in items:
+                merged[labels] = merged.get(labels, 0.0) + value
+        return merged
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, labels)} {value}"
+                for labels, value in sorted(self.collect().items())]
+
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels: Tuple[str, ...], seconds: float) -> None:
+        shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            # One slot per bucket, one for +Inf, then the running sum
+            counts = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, seconds)] += 1
+        counts[-1] += seconds
+
+    def collect(self) -> Dict[tuple, list]:
+        merged: Dict[tuple, list] = {}
+        for items in self._snapshots():
+            for labels, counts in items:
+                total = merged.get(labels)
+                if total is None:
+                    merged[labels] = list(counts)
+                else:
+                    for index, value in enumerate(counts):
+                        total[index] += value
+        return merged
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, counts in sorted(self.collect().items()):
+            running = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                running += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {running}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {counts[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {running}")
+        return lines
+
+
+class Gauge:
+    """Value owned by the event loop thread (or read from a callback)"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), callback: Callable = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[tuple, float] = {}
+        self.callback = callback
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) - amount
+
+    def render(self) -> List[str]:
+        values = self.callback() if self.callback is not None else self.values
+        return [f"{self.name}{_labels(self.labelnames, labels)} {value}"
+                for labels, value in sorted(values.items())]
+
+
+http_requests = Counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+http_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route"), HTTP_BUCKETS
+)
+http_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served", ("method",))
+db_queries = Counter("db_queries_total", "Database statements executed", ("operation",))
+db_query_errors = Counter("db_query_errors_total", "Database statements that raised", ("operation",))
+db_duration = Histogram(
+    "db_query_duration_seconds", "Database statement latency", ("operation",), DB_BUCKETS
+)
+
+_engines = []
+
+
+def _pool_gauges() -> Dict[tuple, float]:
+    values = {}
+    for engine in _engines:
+        status = pool_status(engine)
+        for key in ("size", "checked_in", "checked_out", "overflow"):
+            if key in status:
+                values[(engine.url.get_backend_name(), engine.url.get_driver_name(), key)] = status[key]
+    return values
+
+
+db_pool = Gauge(
+    "db_pool_connections", "Connection pool occupancy", ("backend", "driver", "state"), callback=_pool_gauges
+)
+
+REGISTRY = [http_requests, http_duration, http_in_flight, db_queries, db_query_errors, db_duration, db_pool]
+
+
+def _render_pool_wait() -> List[str]:
+    snapshot = wait_stats.snapshot()
+    lines = [
+        "# HELP db_pool_wait_seconds Time spent waiting to check out a pooled connection",
+        "# TYPE db_pool_wait_seconds histogram",
+    ]
+    for bound, count in snapshot["wait_seconds_buckets"].items():
+        lines.append(f'db_pool_wait_seconds_bucket{{le="{bound}"}} {count}')
+    lines.append(f"db_pool_wait_seconds_sum {snapshot['wait_seconds_sum']}")
+    lines.append(f"db_pool_wait_seconds_count {snapshot['checkouts']}")
+    lines.append("# HELP db_pool_timeouts_total Checkouts that gave up after DB_POOL_TIMEOUT")
+    lines.append("# TYPE db_pool_timeouts_total counter")
+    lines.append(f"db_pool_timeouts_total {snapshot['timeouts']}")
+    return lines
+
+
+def render() -> str:
+    """Prometheus text exposition format of every metric in this process"""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    lines.extend(_render_pool_wait())
+    return "\n".join(lines) + "\n"
+
+
+def _operation(statement: str) -> str:
+    word = statement.lstrip()[:8].split(None, 1)
+    return word[0].upper() if word else "OTHER"
+
+
+def instrument_engine(engine, track_pool: bool = True) -> None:
+    """Count and time every statement run through ``engine`` (sync or async).
+
+    ``track_pool`` adds its pool to db_pool_connections; leave it off for
+    secondary engines, whose labels would collide with the primary's.
+    """
+    engine = getattr(engine, "sync_engine", engine)
+    if track_pool:
+        _engines.append(engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        labels = (_operation(statement),)
+        db_queries.inc(labels)
+        db_duration.observe(labels, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+        db_query_errors.inc((_operation(context.statement or ""),))
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route request counts and latency.
+
+    The route label is the matched path template (``/api/v1/events/{event_id}``),
+    which FastAPI leaves in the scope once routing is done.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        http_in_flight.inc((method,))
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec((method,))
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNMATCHED_ROUTE
+            http_requests.inc((method, template, str(status_code)))
+            http_duration.observe((method, template), elapsed)
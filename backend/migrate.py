@@ -0,0 +1,68 @@
+"""Apply database migrations; run once per deploy, before the API workers.
+
+    python migrate.py            # upgrade to the newest revision
+    python migrate.py current    # print the applied revision
+    python migrate.py check      # exit 1 unless the database is up to date
+
+Databases created by create_all() before migrations existed are stamped
+with the initial revision first, then upgraded like any other.
+"""
+import os
+import sys
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+
+from database import engine
+from schema_version import SCHEMA_REVISION, current_revision
+
+BASELINE_REVISION = "0001_initial"
+
+
+def _config() -> Config:
+    return Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
+
+
+def _check_head(config: Config) -> None:
+    head = ScriptDirectory.from_config(config).get_current_head()
+    if head != SCHEMA_REVISION:
+        raise SystemExit(
+            f"schema_version.SCHEMA_REVISION is {SCHEMA_REVISION} but the newest migration is {head}; update it."
+        )
+
+
+def upgrade(config: Config) -> None:
+    tables = inspect(engine).get_table_names()
+    if "alembic_version" not in tables and "events" in tables:
+        print(f"Adopting existing schema at {BASELINE_REVISION}")
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+    print(f"Database schema is at {current_revision(engine)}")
+
+
+def main(argv) -> int:
+    action = argv[0] if argv else "upgrade"
+    config = _config()
+    _check_head(config)
+
+    if action == "upgrade":
+        upgrade(config)
+    elif action == "current":
+        print(current_revision(engine) or "none")
+    elif action == "check":
+        revision = current_revision(engine)
+        if revision != SCHEMA_REVISION:
+            print(f"Database schema is at {revision or 'no revision'}, expected {SCHEMA_REVISION}")
+            return 1
+        print(f"Database schema is up to date ({revision})")
+    else:
+        print(__doc__)
+        return 2
+    engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
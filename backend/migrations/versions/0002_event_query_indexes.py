@@ -0,0 +1,64 @@
+"""Indexes for keyset pagination, conditional requests and full-text search
+
+Revision ID: 0002_event_query_indexes
+Revises: 0001_initial
+Create Date: 2026-10-18
+
+Databases created by create_all() after these indexes were added to the
+models already have some of them, so every step is IF NOT EXISTS. On
+PostgreSQL the indexes are built CONCURRENTLY to keep the table writable;
+adding the stored search_vector column still rewrites the table once.
+"""
+from alembic import op
+
+
+revision = "0002_event_query_indexes"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+# Must match models.SEARCH_CONFIG
+SEARCH_CONFIG = "english"
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def _create_index(name, columns, **kw) -> None:
+    if _is_postgres():
+        with op.get_context().autocommit_block():
+            op.create_index(name, "events", columns, if_not_exists=True, postgresql_concurrently=True, **kw)
+    else:
+        op.create_index(name, "events", columns, if_not_exists=True)
+
+
+def _drop_index(name) -> None:
+    if _is_postgres():
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name="events", if_exists=True, postgresql_concurrently=True)
+    else:
+        op.drop_index(name, table_name="events", if_exists=True)
+
+
+def upgrade() -> None:
+    _create_index("ix_events_date_time_id", ["date", "time", "id"])
+    _create_index("ix_events_updated_at", ["updated_at"])
+
+    if _is_postgres():
+        op.execute(
+            "ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')"
+            ") STORED"
+        )
+        _create_index("ix_events_search_vector", ["search_vector"], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    if _is_postgres():
+        _drop_index("ix_events_search_vector")
+        op.execute("ALTER TABLE events DROP COLUMN IF EXISTS search_vector")
+    _drop_index("ix_events_updated_at")
+    _drop_index("ix_events_date_time_id")
@@ -0,0 +1,37 @@
+"""Shared token revocation: users.token_version and revoked_tokens
+
+Revision ID: 0003_token_revocation
+Revises: 0002_event_query_indexes
+Create Date: 2026-10-18
+
+Both used to live in per-worker memory, so a logout only took effect on
+the worker that served it.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_token_revocation"
+down_revision = "0002_event_query_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("token_version", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.create_table(
+        "revoked_tokens",
+        sa.Column("jti", sa.String(64), primary_key=True),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_revoked_tokens_expires_at", "revoked_tokens", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_revoked_tokens_expires_at", table_name="revoked_tokens")
+    op.drop_table("revoked_tokens")
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("token_version")
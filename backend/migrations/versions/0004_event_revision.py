@@ -0,0 +1,56 @@
+"""Event table revision counter for list validators
+
+Revision ID: 0004_event_revision
+Revises: 0003_token_revocation
+Create Date: 2026-10-18
+
+Triggers bump event_revision.value on every write to events, whichever
+code path (or psql session) makes it, so list ETags change exactly when
+the table does. PostgreSQL bumps once per statement, SQLite once per row.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004_event_revision"
+down_revision = "0003_token_revocation"
+branch_labels = None
+depends_on = None
+
+
+_BUMP = "UPDATE event_revision SET value = value + 1 WHERE id = 1"
+
+
+def upgrade() -> None:
+    op.create_table(
+        "event_revision",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("value", sa.BigInteger(), nullable=False),
+    )
+    op.execute("INSERT INTO event_revision (id, value) VALUES (1, 0)")
+
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            "CREATE OR REPLACE FUNCTION bump_event_revision() RETURNS trigger LANGUAGE plpgsql AS "
+            f"$$ BEGIN {_BUMP}; RETURN NULL; END $$"
+        )
+        op.execute(
+            "CREATE TRIGGER events_revision AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON events "
+            "FOR EACH STATEMENT EXECUTE FUNCTION bump_event_revision()"
+        )
+    else:
+        for action in ("INSERT", "UPDATE", "DELETE"):
+            op.execute(
+                f"CREATE TRIGGER events_revision_{action.lower()} AFTER {action} ON events "
+                f"BEGIN {_BUMP}; END"
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP TRIGGER IF EXISTS events_revision ON events")
+        op.execute("DROP FUNCTION IF EXISTS bump_event_revision()")
+    else:
+        for action in ("insert", "update", "delete"):
+            op.execute(f"DROP TRIGGER IF EXISTS events_revision_{action}")
+    op.drop_table("event_revision")
@@ -0,0 +1,38 @@
+"""Revocation timestamps for incremental reloads
+
+Revision ID: 0005_revocation_times
+Revises: 0004_event_revision
+Create Date: 2026-10-18
+
+Workers keep revoked tokens in memory and only re-read what was revoked
+since their last refresh: revoked_tokens.revoked_at for single tokens,
+users.tokens_revoked_at for logout-all.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_revocation_times"
+down_revision = "0004_event_revision"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("revoked_tokens") as batch:
+        batch.add_column(
+            sa.Column("revoked_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False)
+        )
+        batch.create_index("ix_revoked_tokens_revoked_at", ["revoked_at"])
+    with op.batch_alter_table("users") as batch:
+        batch.add_column(sa.Column("tokens_revoked_at", sa.DateTime(timezone=True), nullable=True))
+        batch.create_index("ix_users_tokens_revoked_at", ["tokens_revoked_at"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("users") as batch:
+        batch.drop_index("ix_users_tokens_revoked_at")
+        batch.drop_column("tokens_revoked_at")
+    with op.batch_alter_table("revoked_tokens") as batch:
+        batch.drop_index("ix_revoked_tokens_revoked_at")
+        batch.drop_column("revoked_at")
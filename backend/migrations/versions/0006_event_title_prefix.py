@@ -0,0 +1,43 @@
+"""Title prefix index for typeahead suggestions
+
+Revision ID: 0006_event_title_prefix
+Revises: 0005_revocation_times
+Create Date: 2026-10-18
+
+/events/search/suggest looks titles up by prefix as a range over
+lower(title) and stops at its limit, instead of ranking every full-text
+match. The index is in byte order ("C" collation on PostgreSQL, SQLite's
+default), which makes a prefix a plain range and returns the rows already
+sorted. Built CONCURRENTLY on PostgreSQL to keep the table writable.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006_event_title_prefix"
+down_revision = "0005_revocation_times"
+branch_labels = None
+depends_on = None
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    if _is_postgres():
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_events_title_prefix", "events", [sa.text('(lower(title)) COLLATE "C"'), "id"],
+                if_not_exists=True, postgresql_concurrently=True,
+            )
+    else:
+        op.create_index("ix_events_title_prefix", "events", [sa.text("lower(title)"), "id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    if _is_postgres():
+        with op.get_context().autocommit_block():
+            op.drop_index("ix_events_title_prefix", table_name="events", if_exists=True, postgresql_concurrently=True)
+    else:
+        op.drop_index("ix_events_title_prefix", table_name="events", if_exists=True)
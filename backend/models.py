@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Time, Text, DateTime, func
+from sqlalchemy import BigInteger, Column, Integer, String, Date, Time, Text, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -11,6 +11,19 @@ class User(Base):
     email = Column(String(255), unique=True, index=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
     role = Column(String(20), nullable=False, default="normal")
+    # Bumped by logout-all; tokens carrying an older "ver" are rejected
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # When token_version was last bumped; workers reload recent bumps only
+    tokens_revoked_at = Column(DateTime(timezone=True), nullable=True, index=True)
+
+
+class RevokedToken(Base):
+    """Logged-out token ids, kept until the token would have expired anyway"""
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(64), primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
 
 
 class Event(Base):
@@ -23,6 +36,23 @@ class Event(Base):
     time = Column(Time, nullable=False)
     image_url = Column(String(500), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
+
+    __table_args__ = (
+        Index("ix_events_date_time_id", "date", "time", "id"),
+    )
+
+
+class EventRevision(Base):
+    """Single row bumped by triggers on every write to events (migration
+    0004_event_revision); list ETags are derived from it"""
+    __tablename__ = "event_revision"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(BigInteger, nullable=False)
 
 
+# Text search configuration of the search_vector column. That column is a
+# PostgreSQL-only generated column created by migration
+# 0002_event_query_indexes, so it is not mapped here.
+SEARCH_CONFIG = "english"
@@ -0,0 +1,57 @@
+import base64
+import json
+from datetime import date as date_type, time as time_type
+from typing import Tuple
+
+from sqlalchemy import tuple_
+
+import models
+
+
+FORWARD = "next"
+BACKWARD = "prev"
+
+
+def event_sort_key():
+    return (models.Event.date, models.Event.time, models.Event.id)
+
+
+def encode_cursor(event, direction: str = FORWARD) -> str:
+    """Encode the (date, time, id) position of an event as an opaque cursor"""
+    payload = [direction, event.date.isoformat(), event.time.isoformat(), event.id]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, date_type, time_type, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, date_value, time_value, event_id = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in (FORWARD, BACKWARD):
+            raise ValueError(direction)
+        return direction, date_type.fromisoformat(date_value), time_type.fromisoformat(time_value), int(event_id)
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def seek(query, cursor: str, page_size: int):
+    """Apply a keyset seek to ``query`` and return (rows, direction, has_more).
+
+    Rows are always returned in ascending (date, time, id) order. ``has_more``
+    tells whether another page exists beyond this one in the seek direction.
+    """
+    direction, date_value, time_value, event_id = decode_cursor(cursor)
+    key = tuple_(*event_sort_key())
+    position = tuple_(date_value, time_value, event_id)
+
+    if direction == FORWARD:
+        query = query.filter(key > position).order_by(*event_sort_key())
+    else:
+        query = query.filter(key < position).order_by(*(column.desc() for column in event_sort_key()))
+
+    rows = query.limit(page_size + 1).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if direction == BACKWARD:
+        rows.reverse()
+    return rows, direction, has_more
@@ -0,0 +1,99 @@
+import os
+from datetime import date as date_type, datetime, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete, func, insert, or_, select, tuple_, update
+from sqlalchemy.orm import Session
+
+import models
+
+
+# Event dates/times are stored as wall-clock values; "upcoming" is judged
+# against the clock of this zone.
+EVENTS_TIMEZONE = ZoneInfo(os.getenv("EVENTS_TIMEZONE", "UTC"))
+
+
+def current_minute() -> datetime:
+    """Now in EVENTS_TIMEZONE, truncated to the minute so it can key caches"""
+    return datetime.now(EVENTS_TIMEZONE).replace(tzinfo=None, second=0, microsecond=0)
+
+
+# Needed by every list query for ordering and cursors, whatever was requested
+KEY_COLUMNS = ("id", "date", "time")
+
+
+def event_columns(fields):
+    """Event columns backing the given EventOut fields, for a column-only query"""
+    names = set(KEY_COLUMNS).union(fields)
+    if "variants" in names:
+        names.add("image_url")
+    return [getattr(models.Event, column.name) for column in models.Event.__table__.columns if column.name in names]
+
+
+def apply_filters(
+    query,
+    from_date: Optional[date_type] = None,
+    to_date: Optional[date_type] = None,
+    starts_after: Optional[datetime] = None,
+):
+    """Restrict an Event query to a date range and/or events starting at or after a moment.
+
+    Every condition is a range on a leading prefix of the (date, time, id)
+    index, so it stays an index range scan that also yields the list order.
+    """
+    if from_date is not None:
+        query = query.filter(models.Event.date >= from_date)
+    if to_date is not None:
+        query = query.filter(models.Event.date <= to_date)
+    if starts_after is not None:
+        query = query.filter(
+            tuple_(models.Event.date, models.Event.time) >= tuple_(starts_after.date(), starts_after.time())
+        )
+    return query
+
+
+def month_bounds(month: str):
+    first = date_type.fromisoformat(f"{month}-01")
+    following = (first.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return first, following - timedelta(days=1)
+
+
+def calendar_counts(db: Session, first: date_type, last: date_type):
+    return db.query(models.Event.date, func.count(models.Event.id))\
+        .filter(models.Event.date >= first, models.Event.date <= last)\
+        .group_by(models.Event.date)\
+        .order_by(models.Event.date)\
+        .all()
+
+
+def event_revision(db: Session) -> int:
+    """Exact change marker of the events table, bumped by triggers on every write"""
+    return db.execute(select(models.EventRevision.value).where(models.EventRevision.id == 1)).scalar() or 0
+
+
+# Event writes are single statements returning the written row, so a
+# handler never has to read the row back after writing it
+_events = models.Event.__table__
+
+
+def event_by_id(event_id: int):
+    return select(*_events.c).where(_events.c.id == event_id)
+
+
+def insert_event(values: dict):
+    return insert(_events).values(**values).returning(*_events.c)
+
+
+def update_event(event_id: int, changes: dict):
+    """UPDATE that only matches when some value actually differs.
+
+    No row back means the event is missing or already has these values;
+    ``updated_at`` (onupdate) is only bumped by a real change.
+    """
+    differs = or_(*(_events.c[name].is_distinct_from(value) for name, value in changes.items()))
+    return update(_events).where(_events.c.id == event_id, differs).values(**changes).returning(*_events.c)
+
+
+def delete_event(event_id: int):
+    return delete(_events).where(_events.c.id == event_id).returning(_events.c.id, _events.c.title)
@@ -0,0 +1,262 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
+from urllib.parse import parse_qs
+
+import orjson
+
+from auth import decode_access_token
+from cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+# Opt-in: the default buckets are sized for interactive clients, not scripts
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "false").lower() in ("1", "true", "yes")
+# Requests being served by this worker before new ones are shed with 503; 0 disables
+RATE_LIMIT_MAX_IN_FLIGHT = int(os.getenv("RATE_LIMIT_MAX_IN_FLIGHT", "512"))
+RATE_LIMIT_SHED_RETRY_AFTER = os.getenv("RATE_LIMIT_SHED_RETRY_AFTER", "1")
+# Key anonymous clients by the first X-Forwarded-For address (only behind a trusted proxy)
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() in ("1", "true", "yes")
+RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", "16"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+
+class Rule(NamedTuple):
+    rate: float  # tokens added per second
+    burst: float  # bucket size
+
+
+DEFAULT_RULES = {
+    "auth": Rule(0.5, 10),  # login/signup: bcrypt
+    "list": Rule(10, 40),   # list, search, export
+    "read": Rule(20, 100),
+    "write": Rule(5, 20),
+}
+
+
+def parse_rules(value: str) -> Dict[str, Rule]:
+    """``"auth=0.5:10,read=50:200"`` -> {route class: Rule(rate per second, burst)}"""
+    rules = dict(DEFAULT_RULES)
+    for item in value.split(","):
+        name, _, spec = item.partition("=")
+        rate, _, burst = spec.partition(":")
+        if name.strip() and rate.strip():
+            rate = float(rate)
+            rules[name.strip()] = Rule(rate, float(burst) if burst.strip() else max(1.0, rate))
+    return rules
+
+
+RATE_LIMIT_RULES = parse_rules(os.getenv("RATE_LIMIT_RULES", ""))
+
+API_PREFIX = "/api/v1"
+# Probes, scrapes and long-lived streams are neither limited nor counted in flight
+EXEMPT_PREFIXES = ("/health", "/metrics", f"{API_PREFIX}/events/stream")
+AUTH_PATHS = (f"{API_PREFIX}/auth/login", f"{API_PREFIX}/auth/signup")
+LIST_PATHS = (f"{API_PREFIX}/events/", f"{API_PREFIX}/events/search", f"{API_PREFIX}/events/export")
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+# Offset pages get slower the deeper they go; charge one extra token per this many pages
+DEEP_PAGE_STEP = 50
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    if method == "OPTIONS" or path.startswith(EXEMPT_PREFIXES):
+        return None
+    if path in AUTH_PATHS:
+        return "auth"
+    if method in WRITE_METHODS:
+        return "write"
+    if path in LIST_PATHS:
+        return "list"
+    return "read"
+
+
+def request_cost(route: str, query_string: bytes) -> float:
+    if route == "list" and b"page=" in query_string:
+        try:
+            page = int(parse_qs(query_string.decode("latin-1")).get("page", ["1"])[0])
+        except ValueError:
+            return 1.0
+        return 1.0 + min(max(page, 1), 10_000) // DEEP_PAGE_STEP
+    return 1.0
+
+
+class RateLimitStore:
+    """Token bucket state behind the limiter.
+
+    ``take`` is one atomic read-modify-write per request, which is what a
+    shared backend has to provide (e.g. a small Redis Lua script) so that
+    every worker draws from the same buckets. The default is per-process;
+    assign ``ratelimit.limiter_store`` before ``create_app()`` to replace it.
+    """
+
+    def take(self, key: str, rule: Rule, cost: float = 1.0) -> float:
+        """Spend ``cost`` tokens; 0 if allowed, else seconds until they would be available"""
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class ShardedBucketStore(RateLimitStore):
+    """In-process buckets split over shards, each with its own lock.
+
+    Each shard forgets its least recently used keys beyond its share of
+    ``max_keys``; a forgotten client simply starts again with a full bucket.
+    """
+
+    def __init__(self, shards: int = 16, max_keys: int = 100_000):
+        self._shards = [OrderedDict() for _ in range(max(1, shards))]
+        self._locks = [threading.Lock() for _ in self._shards]
+        self.max_keys_per_shard = max(1, max_keys // len(self._shards))
+        self.evictions = 0
+
+    def take(self, key: str, rule: Rule, cost: float = 1.0) -> float:
+        index = hash(key) % len(self._shards)
+        buckets = self._shards[index]
+        now = time.monotonic()
+        with self._locks[index]:
+            state = buckets.get(key)
+            if state is None:
+                tokens = rule.burst
+                if len(buckets) >= self.max_keys_per_shard:
+                    buckets.popitem(last=False)
+                    self.evictions += 1
+            else:
+                tokens = min(rule.burst, state[0] + (now - state[1]) * rule.rate)
+                buckets.move_to_end(key)
+            if tokens >= cost:
+                buckets[key] = (tokens - cost, now)
+                return 0.0
+            buckets[key] = (tokens, now)
+        return (cost - tokens) / rule.rate if rule.rate > 0 else 60.0
+
+    def stats(self) -> dict:
+        return {"keys": sum(len(shard) for shard in self._shards), "shards": len(self._shards),
+                "evictions": self.evictions}
+
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+def _json_error(status_code: int, detail: str, retry_after: str):
+    body = orjson.dumps({"detail": detail, "status_code": status_code})
+    start = {
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", retry_after.encode()),
+        ],
+    }
+    return start, {"type": "http.response.body", "body": body}
+
+
+class RateLimitMiddleware:
+    """Pure ASGI admission control in front of the routes.
+
+    Requests beyond RATE_LIMIT_MAX_IN_FLIGHT are shed with 503 before any
+    work is done. Otherwise each request takes tokens from the bucket of its
+    route class (auth, list, read, write) and client: the user id of a valid
+    bearer token, or the client address. An empty bucket answers 429. Both
+    carry Retry-After.
+    """
+
+    def __init__(self, app, store: Optional[RateLimitStore] = None, rules: Dict[str, Rule] = None,
+                 max_in_flight: int = RATE_LIMIT_MAX_IN_FLIGHT):
+        self.app = app
+        self.store = store if store is not None else limiter_store
+        self.rules = rules if rules is not None else RATE_LIMIT_RULES
+        self.max_in_flight = max_in_flight
+        # Verified token -> client key, so a JWT is decoded once, not per request
+        self._token_clients = LRUCache(10_000, ttl=300)
+
+    def _client(self, scope) -> str:
+        authorization = _header(scope, b"authorization")
+        if authorization and authorization[:7].lower() == b"bearer ":
+            token = authorization[7:].decode("latin-1")
+            client = self._token_clients.get(token)
+            if client is None:
+                try:
+                    client = f"user:{decode_access_token(token)['sub']}"
+                except (ValueError, KeyError):
+                    client = ""
+                self._token_clients.set(token, client)
+            if client:
+                return client
+        if RATE_LIMIT_TRUST_FORWARDED:
+            forwarded = _header(scope, b"x-forwarded-for")
+            if forwarded:
+                return f"ip:{forwarded.split(b',')[0].strip().decode('latin-1')}"
+        address = scope.get("client")
+        return f"ip:{address[0]}" if address else "ip:unknown"
+
+    async def _reject(self, send, status_code: int, detail: str, retry_after: str) -> None:
+        start, body = _json_error(status_code, detail, retry_after)
+        await send(start)
+        await send(body)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route = route_class(scope["method"], scope["path"])
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        if self.max_in_flight and limiter_stats.in_flight >= self.max_in_flight:
+            limiter_stats.shed += 1
+            await self._reject(send, 503, "Server is busy. Please retry shortly.", RATE_LIMIT_SHED_RETRY_AFTER)
+            return
+
+        rule = self.rules.get(route)
+        if rule is not None:
+            # A request may cost at most a full bucket, or it could never be allowed
+            cost = min(request_cost(route, scope["query_string"]), rule.burst)
+            wait = self.store.take(f"{route}:{self._client(scope)}", rule, cost)
+            if wait:
+                limiter_stats.limited[route] = limiter_stats.limited.get(route, 0) + 1
+                await self._reject(
+                    send, 429, "Too many requests. Please slow down.", str(max(1, math.ceil(wait)))
+                )
+                return
+
+        limiter_stats.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter_stats.in_flight -= 1
+
+
+class LimiterStats:
+    """Counters owned by the event loop thread"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.shed = 0
+        self.limited: Dict[str, int] = {}
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": RATE_LIMIT_ENABLED,
+            "in_flight": self.in_flight,
+            "max_in_flight": RATE_LIMIT_MAX_IN_FLIGHT,
+            "shed": self.shed,
+            "limited": dict(self.limited),
+            "rules": {name: rule._asdict() for name, rule in RATE_LIMIT_RULES.items()},
+            "store": limiter_store.stats(),
+        }
+
+
+limiter_store: RateLimitStore = ShardedBucketStore(RATE_LIMIT_SHARDS, RATE_LIMIT_MAX_KEYS)
+limiter_stats = LimiterStats()
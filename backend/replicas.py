@@ -0,0 +1,281 @@
+import asyncio
+import itertools
+import logging
+import os
+import time
+from typing import List, Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from cache import response_cache
+from database import DB_ASYNC, SessionLocal, AsyncSessionLocal, _async_url, _engine_options
+
+logger = logging.getLogger(__name__)
+
+
+# Comma-separated read replica URLs; empty keeps every query on DATABASE_URL
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_CHECK_SECONDS = float(os.getenv("DB_REPLICA_CHECK_SECONDS", "5"))
+# A PostgreSQL replica further behind than this is skipped until it catches up
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "10"))
+# After a write, the same client reads from the primary for this long
+DB_REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))
+
+STICKY_COOKIE = "db_primary_until"
+# Same deadline as the cookie, for cross-origin clients that do not send
+# credentials: they echo the last value they were given on every request
+STICKY_HEADER = "X-DB-Primary-Until"
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+# 0 while idle; time since the last replayed transaction while WAL is still being applied
+_PG_LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.engine = create_engine(url, echo=False, future=True, **_engine_options(url))
+        self.SessionLocal = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine, future=True, info={"replica": True}
+        )
+        if DB_ASYNC:
+            async_url = _async_url(url)
+            self.async_engine = create_async_engine(async_url, echo=False, **_engine_options(async_url, async_mode=True))
+            self.AsyncSessionLocal = async_sessionmaker(
+                self.async_engine, autoflush=False, expire_on_commit=False, info={"replica": True}
+            )
+        else:
+            self.async_engine = None
+            self.AsyncSessionLocal = None
+        self.name = self.engine.url.render_as_string(hide_password=True)
+        self.healthy = True
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self.failures = 0
+        event.listen(self.engine, "handle_error", self._on_error)
+        if self.async_engine is not None:
+            event.listen(self.async_engine.sync_engine, "handle_error", self._on_error)
+
+    def _on_error(self, context) -> None:
+        # A dropped connection takes the replica out of rotation right away
+        # instead of failing requests until the next health check
+        if context.is_disconnect:
+            self.mark_down(str(context.original_exception))
+
+    def mark_down(self, reason: str) -> None:
+        if self.healthy:
+            logger.warning("Read replica %s taken out of rotation: %s", self.name, reason)
+        self.healthy = False
+        self.error = reason
+        self.failures += 1
+
+    def check(self) -> None:
+        """Blocking health check: reachable, and not lagging too far behind"""
+        try:
+            with self.engine.connect() as connection:
+                if self.engine.url.get_backend_name() == "postgresql":
+                    self.lag = float(connection.execute(_PG_LAG_QUERY).scalar() or 0)
+                else:
+                    connection.execute(text("SELECT 1"))
+                    self.lag = 0.0
+        except DBAPIError as e:
+            self.mark_down(str(e.orig))
+            return
+        if self.lag > DB_REPLICA_MAX_LAG_SECONDS:
+            self.mark_down(f"replication lag {self.lag:.1f}s")
+            return
+        if not self.healthy:
+            logger.info("Read replica %s back in rotation", self.name)
+        self.healthy = True
+        self.error = None
+
+    def status(self) -> dict:
+        return {
+            "url": self.name,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "error": self.error,
+            "failures": self.failures,
+        }
+
+    def dispose(self) -> None:
+        self.engine.dispose()
+
+
+class ReplicaSet:
+    """Read replicas handed out round-robin, skipping unhealthy ones.
+
+    With no healthy replica, reads fall back to the primary.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(url) for url in urls]
+        self.primary_reads = 0
+        self.replica_reads = 0
+        self._next = itertools.count()
+        self._checker: Optional[asyncio.Task] = None
+
+    def pick(self) -> Optional[Replica]:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)]
+
+    def check_all(self) -> None:
+        for replica in self.replicas:
+            replica.check()
+
+    async def start(self) -> None:
+        if not self.replicas:
+            return
+        await run_in_threadpool(self.check_all)
+        self._checker = asyncio.create_task(self._check_forever())
+
+    async def _check_forever(self) -> None:
+        while True:
+            await asyncio.sleep(DB_REPLICA_CHECK_SECONDS)
+            try:
+                await run_in_threadpool(self.check_all)
+            except Exception as e:
+                logger.error("Read replica health check failed: %s", e)
+
+    async def stop(self) -> None:
+        if self._checker is not None:
+            self._checker.cancel()
+            self._checker = None
+        for replica in self.replicas:
+            if replica.async_engine is not None:
+                await replica.async_engine.dispose()
+            replica.dispose()
+
+    def session_factory(self, read_only: bool):
+        """Session factory for a request: a replica's for reads, else the primary's"""
+        replica = self.pick() if read_only and self.replicas else None
+        if replica is None:
+            if read_only:
+                self.primary_reads += 1
+            return AsyncSessionLocal if DB_ASYNC else SessionLocal
+        self.replica_reads += 1
+        return replica.AsyncSessionLocal if DB_ASYNC else replica.SessionLocal
+
+    def status(self) -> dict:
+        return {
+            "replicas": [replica.status() for replica in self.replicas],
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "sticky_seconds": DB_REPLICA_STICKY_SECONDS,
+        }
+
+
+replica_set = ReplicaSet(DATABASE_REPLICA_URLS)
+
+
+def prefers_primary(request: Request) -> bool:
+    """True inside the client's sticky window after one of its writes"""
+    now = time.time()
+    for until in (request.headers.get(STICKY_HEADER), request.cookies.get(STICKY_COOKIE)):
+        try:
+            if until is not None and float(until) > now:
+                return True
+        except ValueError:
+            pass
+    return False
+
+
+def _read_session(request: Request):
+    sticky = prefers_primary(request)
+    db = replica_set.session_factory(not sticky)()
+    if sticky and replica_set.replicas:
+        # Cached responses may have been rendered from a replica that had
+        # not seen this client's write yet
+        db.info["read_your_writes"] = True
+    return db
+
+
+if DB_ASYNC:
+    async def get_read_db(request: Request):
+        async with _read_session(request) as db:
+            yield db
+else:
+    def get_read_db(request: Request):
+        db = _read_session(request)
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+def use_cache(db) -> bool:
+    """False when the request must see its own recent writes"""
+    return not db.info.get("read_your_writes", False)
+
+
+def cache_ttl(db) -> Optional[float]:
+    """Lifetime for a response rendered from ``db``: replica reads may be
+    behind, so they are only cached for the sticky window (None = default)
+    """
+    return DB_REPLICA_STICKY_SECONDS if db.info.get("replica") else None
+
+
+def may_cache(db) -> bool:
+    """False for a replica read that may predate this worker's latest write.
+
+    The write moved the cache generation forward, so the replica's older
+    rows would be cached under the new generation.
+    """
+    return not db.info.get("replica") or response_cache.seconds_since_write() > DB_REPLICA_MAX_LAG_SECONDS
+
+
+async def run_read_session(request: Request, fn, *args, **kwargs):
+    """database.run_session on a replica, unless the client just wrote"""
+    factory = replica_set.session_factory(not prefers_primary(request))
+    if DB_ASYNC:
+        async with factory() as db:
+            return await db.run_sync(fn, *args, **kwargs)
+
+    def call():
+        with factory() as db:
+            return fn(db, *args, **kwargs)
+
+    return await run_in_threadpool(call)
+
+
+class ReadYourWritesMiddleware:
+    """Pure ASGI middleware that starts a client's sticky-to-primary window.
+
+    Every successful write response carries the window's end, as a
+    short-lived cookie and in the X-DB-Primary-Until header. A client that
+    sends either back has its next reads skip replicas that may not have
+    replayed the write yet, whichever worker serves them.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + DB_REPLICA_STICKY_SECONDS
+                cookie = (
+                    f"{STICKY_COOKIE}={until:.3f}; Max-Age={int(DB_REPLICA_STICKY_SECONDS) + 1}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"set-cookie", cookie.encode()),
+                    (STICKY_HEADER.lower().encode(), f"{until:.3f}".encode()),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from auth import ACCESS_TOKEN_EXPIRE_MINUTES
+from database import run_session
+from models import RevokedToken, User
+
+logger = logging.getLogger(__name__)
+
+
+# How often each worker reloads the revocations made by the others
+TOKEN_REVOCATION_CHECK_SECONDS = float(os.getenv("TOKEN_REVOCATION_CHECK_SECONDS", "5"))
+# Every reload reaches this far behind the previous one, for clock skew
+# between workers and transactions that commit after their timestamp
+RELOAD_OVERLAP = timedelta(seconds=60)
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands timestamps back without a time zone
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _store_revocation(db: Session, jti: str, expires_at: datetime) -> None:
+    now = datetime.now(timezone.utc)
+    try:
+        # Rows of tokens that have expired anyway are of no further use
+        db.execute(delete(RevokedToken).where(RevokedToken.expires_at < now))
+        db.merge(RevokedToken(jti=jti, expires_at=expires_at, revoked_at=now))
+        db.commit()
+    except IntegrityError:
+        # Revoked concurrently by another request
+        db.rollback()
+
+
+def _store_user_revocation(db: Session, user_id: int) -> int:
+    try:
+        version = db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(token_version=User.token_version + 1, tokens_revoked_at=datetime.now(timezone.utc))
+            .returning(User.token_version)
+        ).scalar_one()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return version
+
+
+def _load_revocations(db: Session, since: datetime):
+    tokens = db.execute(
+        select(RevokedToken.jti, RevokedToken.expires_at).where(RevokedToken.revoked_at >= since)
+    ).all()
+    users = db.execute(
+        select(User.id, User.token_version, User.tokens_revoked_at).where(User.tokens_revoked_at >= since)
+    ).all()
+    return tokens, users
+
+
+class TokenDenylist:
+    """Revoked tokens, shared by every worker through the database.
+
+    Logging out stores the token's ``jti`` in revoked_tokens; logging out
+    everywhere bumps users.token_version, so tokens carrying an older
+    ``ver`` are denied. Each worker keeps both in memory and reloads what was
+    revoked since its last refresh every TOKEN_REVOCATION_CHECK_SECONDS in
+    the background, so checking a token never waits on the database. The
+    worker that revokes rejects the token at once, the others after their
+    next refresh. Entries are dropped once the tokens would have expired.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._tokens: Dict[str, float] = {}  # jti -> token expiry
+        self._users: Dict[int, Tuple[int, float]] = {}  # user id -> (oldest valid ver, until)
+        self._loaded_at: Optional[datetime] = None
+        self._refresher: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        await self.refresh()
+        self._refresher = asyncio.create_task(self._refresh_forever())
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("Token revocation refresh failed: %s", e)
+
+    async def stop(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+
+    async def refresh(self) -> None:
+        now = datetime.now(timezone.utc)
+        if self._loaded_at is None:
+            since = now - timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        else:
+            since = self._loaded_at - RELOAD_OVERLAP
+        tokens, users = await run_session(_load_revocations, since)
+        for jti, expires_at in tokens:
+            self._tokens[jti] = _utc(expires_at).timestamp()
+        for user_id, version, revoked_at in users:
+            self._deny_versions(user_id, version, _utc(revoked_at).timestamp() + ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+        self._loaded_at = now
+
+        expired = time.time()
+        self._tokens = {jti: exp for jti, exp in self._tokens.items() if exp > expired}
+        self._users = {user_id: entry for user_id, entry in self._users.items() if entry[1] > expired}
+
+    def _deny_versions(self, user_id: int, version: int, until: float) -> None:
+        current = self._users.get(user_id)
+        if current is not None:
+            version, until = max(version, current[0]), max(until, current[1])
+        self._users[user_id] = (version, until)
+
+    async def revoke(self, payload: dict) -> None:
+        jti = payload.get("jti")
+        if not jti:
+            return
+        expires = payload.get("exp", 0)
+        if expires <= time.time():
+            return
+        self._tokens[jti] = expires
+        await run_session(_store_revocation, jti, datetime.fromtimestamp(expires, timezone.utc))
+
+    async def revoke_user(self, user_id: int) -> None:
+        """Deny every token issued to the user so far"""
+        version = await run_session(_store_user_revocation, user_id)
+        self._deny_versions(user_id, version, time.time() + ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+    def is_revoked(self, payload: dict, user_id: int) -> bool:
+        jti = payload.get("jti")
+        if jti and jti in self._tokens:
+            return True
+        denied = self._users.get(user_id)
+        return denied is not None and payload.get("ver", 0) < denied[0]
+
+
+token_denylist = TokenDenylist(TOKEN_REVOCATION_CHECK_SECONDS)
@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends
+
+from deps import CurrentUser, require_admin
+from cache import response_cache
+from database import engine, async_engine
+from pool_stats import pool_status, wait_stats
+from hashing import password_hasher
+from images import image_pipeline
+import changefeed
+from ratelimit import limiter_stats
+from replicas import replica_set
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get(
+    "/cache",
+    summary="Response cache statistics",
+    description="Hit/miss/eviction counters of the event response cache. Requires admin authentication."
+)
+async def cache_stats(current_user: CurrentUser = Depends(require_admin)):
+    return response_cache.stats()
+
+
+@router.get(
+    "/pool",
+    summary="Database connection pool statistics",
+    description="Live pool occupancy and checkout wait-time histogram. Requires admin authentication."
+)
+async def pool_stats(current_user: CurrentUser = Depends(require_admin)):
+    return {
+        "pool": pool_status(async_engine if async_engine is not None else engine),
+        "wait": wait_stats.snapshot(),
+    }
+
+
+@router.get(
+    "/hashing",
+    summary="Password hashing pool statistics",
+    description="Worker count, queue depth and rejected requests of the bcrypt pool. Requires admin authentication."
+)
+async def hashing_stats(current_user: CurrentUser = Depends(require_admin)):
+    return password_hasher.stats()
+
+
+@router.get(
+    "/images",
+    summary="Image variant pipeline statistics",
+    description="Render counts and derivative cache usage of the local image pipeline. Requires admin authentication."
+)
+async def image_stats(current_user: CurrentUser = Depends(require_admin)):
+    return image_pipeline.stats()
+
+
+@router.get(
+    "/changefeed",
+    summary="Event change feed statistics",
+    description="Connected stream subscribers, buffered history and overflow counts of this worker. Requires admin authentication."
+)
+async def changefeed_stats(current_user: CurrentUser = Depends(require_admin)):
+    return changefeed.hub.stats()
+
+
+@router.get(
+    "/ratelimit",
+    summary="Rate limiter statistics",
+    description="In-flight requests, shed and rate-limited counts per route class of this worker. Requires admin authentication."
+)
+async def ratelimit_stats(current_user: CurrentUser = Depends(require_admin)):
+    return limiter_stats.snapshot()
+
+
+@router.get(
+    "/replicas",
+    summary="Read replica statistics",
+    description="Health, replication lag and read counts of the configured read replicas. Requires admin authentication."
+)
+async def replica_stats(current_user: CurrentUser = Depends(require_admin)):
+    return replica_set.status()
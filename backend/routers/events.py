@@ -1,73 +1,361 @@
 import logging
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Body, Request, Query
-from datetime import date as date_type, time as time_type
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Request, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from datetime import date as date_type
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
+from pydantic import ValidationError
 
-from database import get_db
-import schemas, models
-from deps import get_current_user, require_admin
+from database import get_db, run_db
+import replicas
+import schemas, models, pagination, conditional, bulk, queries, search, serialization, changefeed
+from deps import CurrentUser, get_current_user, require_admin
+from counting import event_counts
+from cache import response_cache
 
 logger = logging.getLogger(__name__)
+# Per-request success lines of the read endpoints; sample them with LOG_SAMPLE_RATES
+access_logger = logging.getLogger(f"{__name__}.access")
 
 router = APIRouter(prefix="/events", tags=["events"])
 
 
+def _apply_change(change: Optional[dict]) -> None:
+    """Invalidate this worker's caches for a write announced on the change
+    feed. The writing worker has already done so; on PostgreSQL this is how
+    the other workers learn of it."""
+    event_counts.invalidate()
+    if change is None:
+        response_cache.invalidate_all()
+    elif change.get("event_id") is not None:
+        response_cache.invalidate_event(change["event_id"])
+    else:
+        response_cache.invalidate_lists()
+
+
+changefeed.hub.watch(_apply_change)
+
+
 @router.get(
     "/", 
     response_model=schemas.EventListResponse,
     summary="List all events with pagination",
-    description="Retrieve a paginated list of all events. Events are ordered by date and time."
+    description=(
+        "Retrieve a paginated list of all events. Events are ordered by date and time. "
+        "Pass the `next_cursor`/`prev_cursor` of a previous response as `cursor` to seek "
+        "directly to the adjacent page instead of using `page`. Use `fields` or `summary` to "
+        "receive only some event fields."
+    )
 )
-def list_events(
+async def list_events(
+    request: Request,
     page: int = Query(1, ge=1, description="Page number (starts from 1)"),
     page_size: int = Query(10, ge=1, le=100, description="Number of events per page (max 100)"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response; overrides page"),
+    include_total: bool = Query(True, description="Include total_count/total_pages (set false to skip counting)"),
+    from_date: Optional[date_type] = Query(None, description="Only events on or after this date (YYYY-MM-DD)"),
+    to_date: Optional[date_type] = Query(None, description="Only events on or before this date (YYYY-MM-DD)"),
+    upcoming: bool = Query(False, description="Only events that have not started yet"),
+    fields: Optional[str] = Query(None, description="Comma-separated event fields to return, e.g. id,title,date,time"),
+    summary: bool = Query(False, description="Leave out event descriptions"),
+    db: Session = Depends(replicas.get_read_db)
 ):
+    if from_date and to_date and from_date > to_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from_date must not be after to_date."
+        )
     try:
-        offset = (page - 1) * page_size
-        total_count = db.query(func.count(models.Event.id)).scalar()
-        
-        events = db.query(models.Event)\
-            .order_by(models.Event.date, models.Event.time)\
-            .offset(offset)\
-            .limit(page_size)\
-            .all()
-        
-        total_pages = (total_count + page_size - 1) // page_size
-        has_next = page < total_pages
-        has_prev = page > 1
+        selected = serialization.select_fields(fields, summary)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {e}. Allowed: {', '.join(serialization.EVENT_FIELDS)}."
+        )
+    filters = dict(from_date=from_date, to_date=to_date, starts_after=queries.current_minute() if upcoming else None)
+    return await run_db(db, _list_events, request, page, page_size, cursor, include_total, filters, selected)
+
+
+def _list_events(
+    db: Session,
+    request: Request,
+    page: int,
+    page_size: int,
+    cursor: Optional[str],
+    include_total: bool,
+    filters: dict,
+    fields: tuple
+):
+    try:
+        list_params = dict(
+            page=None if cursor else page, cursor=cursor, page_size=page_size, include_total=include_total,
+            fields=",".join(fields), **filters
+        )
+        cache_key = response_cache.list_key(**list_params)
+        cached = response_cache.get(cache_key) if replicas.use_cache(db) else None
+        if cached is not None:
+            if conditional.is_not_modified(request, cached.etag, cached.last_modified):
+                return conditional.not_modified(cached.etag, cached.last_modified)
+            return conditional.json_response(cached.body, cached.etag, cached.last_modified)
+
+        # Read before the rows: a write in between leaves the ETag older
+        # than the body, so the next revalidation fetches it again. No
+        # Last-Modified, since deletes do not move any timestamp.
+        etag = conditional.list_etag(queries.event_revision(db), **list_params)
+        last_modified = None
+        if conditional.is_not_modified(request, etag, last_modified):
+            return conditional.not_modified(etag, last_modified)
+
+        filtered = any(value is not None for value in filters.values())
+        # Plain rows of just the needed columns: no identity map, and no
+        # description text loaded for summary or sparse pages
+        base_query = queries.apply_filters(db.query(*queries.event_columns(fields)), **filters)
+
+        if include_total:
+            if filtered:
+                total_count = queries.apply_filters(db.query(func.count(models.Event.id)), **filters).scalar()
+            else:
+                total_count = event_counts.get(db)
+            total_pages = (total_count + page_size - 1) // page_size
+        else:
+            total_count = total_pages = None
+
+        if cursor:
+            try:
+                events, direction, has_more = pagination.seek(base_query, cursor, page_size)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid pagination cursor."
+                )
+            if direction == pagination.FORWARD:
+                has_next, has_prev = has_more, True
+            else:
+                has_next, has_prev = True, has_more
+            current_page = None
+        else:
+            offset = (page - 1) * page_size
+            rows = base_query\
+                .order_by(*pagination.event_sort_key())\
+                .offset(offset)\
+                .limit(page_size + 1)\
+                .all()
+            events = rows[:page_size]
+            has_next = len(rows) > page_size
+            has_prev = page > 1
+            current_page = page
+
+        next_cursor = pagination.encode_cursor(events[-1], pagination.FORWARD) if events and has_next else None
+        prev_cursor = pagination.encode_cursor(events[0], pagination.BACKWARD) if events and has_prev else None
         
-        logger.info(f"Events listed: page {page}, size {page_size}, total {total_count}")
+        access_logger.info("Events listed: page %s, size %s, total %s", current_page, page_size, total_count)
         
-        return {
-            "events": events,
-            "pagination": {
-                "page": page,
-                "page_size": page_size,
-                "total_count": total_count,
-                "total_pages": total_pages,
-                "has_next": has_next,
-                "has_prev": has_prev
-            }
-        }
+        # Rows come straight from the database, so skip per-event pydantic
+        # validation and serialize them directly
+        payload = serialization.event_list_json(events, {
+            "page": current_page,
+            "page_size": page_size,
+            "total_count": total_count,
+            "total_pages": total_pages,
+            "has_next": has_next,
+            "has_prev": has_prev,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor
+        }, fields)
+        if replicas.may_cache(db):
+            response_cache.set(cache_key, payload, etag, last_modified, replicas.cache_ttl(db))
+        return conditional.json_response(payload, etag, last_modified)
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error listing events: {str(e)}")
+        logger.error("Error listing events: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve events. Please try again."
         )
 
 
+@router.get(
+    "/search",
+    response_model=schemas.EventSearchResponse,
+    summary="Full-text search over events",
+    description=(
+        "Search event titles and descriptions. Every word must match; the last word also "
+        "matches as a prefix unless `prefix=false`. Results are ranked by relevance."
+    )
+)
+async def search_events(
+    q: str = Query(..., min_length=1, max_length=200, description="Search text"),
+    prefix: bool = Query(True, description="Treat the last word as a prefix (typeahead)"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results"),
+    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    db: Session = Depends(get_db)
+):
+    return await run_db(db, _search_events, q, prefix, limit, offset)
+
+
+def _search_events(db: Session, q: str, prefix: bool, limit: int, offset: int):
+    try:
+        hits = search.search_events(db, q, prefix=prefix, limit=limit, offset=offset)
+        access_logger.info("Event search: '%s' returned %s results", q, len(hits))
+        return Response(content=serialization.search_json(q, hits), media_type="application/json")
+    except Exception as e:
+        db.rollback()
+        logger.error("Error searching events for '%s': %s", q, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to search events. Please try again."
+        )
+
+
+@router.get(
+    "/search/suggest",
+    response_model=List[schemas.EventSuggestion],
+    summary="Typeahead suggestions",
+    description="Events whose title starts with the typed text (case-insensitive), in title order."
+)
+async def suggest_events(
+    q: str = Query(..., min_length=1, max_length=100, description="Partially typed text"),
+    limit: int = Query(10, ge=1, le=25, description="Maximum number of suggestions"),
+    db: Session = Depends(get_db)
+):
+    rows = await run_db(db, search.suggest_titles, q, limit)
+    return [{"id": event_id, "title": title} for event_id, title in rows]
+
+
+@router.get(
+    "/calendar",
+    response_model=schemas.CalendarResponse,
+    summary="Event counts per day for a month",
+    description="Number of events on each day of the given month (days without events are omitted)."
+)
+async def event_calendar(
+    request: Request,
+    month: str = Query(..., regex=r"^\d{4}-(0[1-9]|1[0-2])$", description="Month as YYYY-MM"),
+    db: Session = Depends(get_db)
+):
+    return await run_db(db, _event_calendar, request, month)
+
+
+def _event_calendar(db: Session, request: Request, month: str):
+    try:
+        cache_key = response_cache.list_key(calendar=month)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            if conditional.is_not_modified(request, cached.etag, cached.last_modified):
+                return conditional.not_modified(cached.etag, cached.last_modified)
+            return conditional.json_response(cached.body, cached.etag, cached.last_modified)
+
+        first, last = queries.month_bounds(month)
+        days = [{"date": day, "count": count} for day, count in queries.calendar_counts(db, first, last)]
+        payload = schemas.CalendarResponse(month=month, days=days).json()
+        etag = conditional.content_etag(payload)
+        response_cache.set(cache_key, payload, etag, None)
+        if conditional.is_not_modified(request, etag, None):
+            return conditional.not_modified(etag, None)
+        return conditional.json_response(payload, etag, None)
+    except Exception as e:
+        logger.error("Error building calendar for %s: %s", month, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve calendar. Please try again."
+        )
+
+
+@router.get(
+    "/export",
+    summary="Export all events",
+    description="Stream every event as NDJSON or CSV, ordered by date and time. Requires admin authentication."
+)
+async def export_events(
+    fmt: str = Query("ndjson", alias="format", regex="^(ndjson|csv)$", description="Output format: ndjson or csv"),
+    current_user: CurrentUser = Depends(require_admin)
+):
+    logger.info("Event export started (%s) by admin %s", fmt, current_user.email)
+    return StreamingResponse(
+        bulk.export_events(fmt),
+        media_type=bulk.FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="events.{fmt}"'}
+    )
+
+
+@router.get(
+    "/stream",
+    summary="Stream event changes",
+    description=(
+        "Server-Sent Events stream of `created`, `updated` and `deleted` notifications, each with the "
+        "change `id`, `event_id` and (when small enough) the event itself. Reconnecting with the "
+        "`Last-Event-ID` header, or `last_event_id`, replays the changes missed in between; a `reset` "
+        "event means changes were lost and the client should refetch."
+    )
+)
+async def stream_events(
+    request: Request,
+    last_event_id: Optional[str] = Query(None, description="Resume after this change id (EventSource sends the Last-Event-ID header instead)"),
+):
+    if changefeed.hub.full:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open change streams. Please retry later.",
+            headers={"Retry-After": "30"}
+        )
+    resume_from = request.headers.get("last-event-id") or last_event_id
+    return StreamingResponse(
+        changefeed.sse_frames(resume_from),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/stream/ws")
+async def stream_events_ws(websocket: WebSocket, last_event_id: Optional[str] = None):
+    """The change stream as WebSocket text messages, one JSON document each"""
+    if changefeed.hub.full:
+        # 1013: try again later
+        await websocket.close(code=1013)
+        return
+    await websocket.accept()
+    try:
+        async for batch in changefeed.hub.listen(last_event_id):
+            for item in batch:
+                await websocket.send_text(changefeed.message(item))
+    except WebSocketDisconnect:
+        return
+    await websocket.close()
+
+
+def _event_response(event, status_code: int = status.HTTP_200_OK, cache_key: Optional[str] = None,
+                    ttl: Optional[float] = None, request: Optional[Request] = None):
+    """JSON response with validators for a freshly read or written event.
+
+    Cached under ``cache_key`` when given, which must have been taken before
+    the row was read. Writes pass none: concurrent writers may invalidate in
+    a different order than they committed. With ``request``, its conditions
+    are evaluated and may turn the response into a 304.
+    """
+    payload = serialization.event_json(event)
+    etag = conditional.event_etag(payload)
+    last_modified = conditional.http_date(event.updated_at)
+    if cache_key is not None:
+        response_cache.set(cache_key, payload, etag, last_modified, ttl)
+    if request is not None and conditional.is_not_modified(request, etag, last_modified):
+        return conditional.not_modified(etag, last_modified)
+    return conditional.json_response(payload, etag, last_modified, status_code)
+
+
 @router.get(
     "/{event_id}", 
     response_model=schemas.EventOut,
     summary="Get event by ID",
     description="Retrieve a specific event by its ID."
 )
-def get_event(event_id: int, db: Session = Depends(get_db)):
+async def get_event(event_id: int, request: Request, db: Session = Depends(replicas.get_read_db)):
+    return await run_db(db, _get_event, event_id, request)
+
+
+def _get_event(db: Session, event_id: int, request: Request):
     try:
         if event_id <= 0:
             raise HTTPException(
@@ -75,21 +363,31 @@ def get_event(event_id: int, db: Session = Depends(get_db)):
                 detail="Event ID must be a positive integer."
             )
         
+        cache_key = response_cache.event_key(event_id)
+        cached = response_cache.get(cache_key) if replicas.use_cache(db) else None
+        if cached is not None:
+            if conditional.is_not_modified(request, cached.etag, cached.last_modified):
+                return conditional.not_modified(cached.etag, cached.last_modified)
+            return conditional.json_response(cached.body, cached.etag, cached.last_modified)
+
         event = db.get(models.Event, event_id)
         if not event:
-            logger.warning(f"Event not found: ID {event_id}")
+            logger.warning("Event not found: ID %s", event_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail=f"Event with ID {event_id} not found."
             )
         
-        logger.info(f"Event retrieved: ID {event_id}")
-        return event
+        access_logger.info("Event retrieved: ID %s", event_id)
+        return _event_response(
+            event, cache_key=cache_key if replicas.may_cache(db) else None, ttl=replicas.cache_ttl(db),
+            request=request,
+        )
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error retrieving event {event_id}: {str(e)}")
+        logger.error("Error retrieving event %s: %s", event_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve event. Please try again."
@@ -103,11 +401,15 @@ def get_event(event_id: int, db: Session = Depends(get_db)):
     summary="Create a new event",
     description="Create a new event. Requires admin authentication."
 )
-def create_event(
+async def create_event(
     event: schemas.EventCreate, 
     db: Session = Depends(get_db), 
-    current_user: models.User = Depends(require_admin)
+    current_user: CurrentUser = Depends(require_admin)
 ):
+    return await run_db(db, _create_event, event, current_user)
+
+
+def _create_event(db: Session, event: schemas.EventCreate, current_user: CurrentUser):
     try:
         if not event.title or not event.title.strip():
             raise HTTPException(
@@ -127,7 +429,7 @@ def create_event(
                 detail="Event time is required."
             )
         
-        event_obj = models.Event(
+        values = dict(
             title=event.title.strip(),
             description=event.description.strip() if event.description else None,
             date=event.date,
@@ -135,136 +437,225 @@ def create_event(
             image_url=event.image_url.strip() if event.image_url else None
         )
         
-        db.add(event_obj)
+        created = db.execute(queries.insert_event(values)).one()
+        changefeed.notify(db, "created", created.id, created)
         db.commit()
-        db.refresh(event_obj)
+        event_counts.invalidate()
+        response_cache.invalidate_lists()
+        search.search_index.add(created.id, created.title, created.description)
         
-        logger.info(f"Event created: '{event_obj.title}' (ID: {event_obj.id}) by admin {current_user.email}")
-        return event_obj
+        logger.info("Event created: '%s' (ID: %s) by admin %s", created.title, created.id, current_user.email)
+        return _event_response(created, status.HTTP_201_CREATED)
         
     except HTTPException:
         raise
     except IntegrityError as e:
         db.rollback()
-        logger.error(f"Database integrity error during event creation: {str(e)}")
+        logger.error("Database integrity error during event creation: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to create event due to data constraints."
         )
     except Exception as e:
         db.rollback()
-        logger.error(f"Unexpected error during event creation: {str(e)}")
+        logger.error("Unexpected error during event creation: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create event. Please try again."
         )
 
 
+@router.post(
+    "/bulk",
+    response_model=schemas.BulkImportResult,
+    summary="Import events in bulk",
+    description=(
+        "Create many events from a JSON array, NDJSON (`application/x-ndjson`) or CSV (`text/csv`, "
+        "header row with title, description, date, time, image_url). Every format is streamed; "
+        "a JSON array is parsed item by item. Valid rows are inserted in batched transactions; "
+        "invalid rows, including rows the database rejects, are reported individually. A body that stops parsing ends the import with "
+        "400; batches committed before that point are kept. Requires admin authentication."
+    )
+)
+async def bulk_create_events(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(require_admin)
+):
+    fmt = bulk.detect_format(request.headers.get("content-type"))
+    received = inserted = 0
+    errors: list = []
+    batch: list = []
+    batch_rows: list = []
+
+    async def flush():
+        nonlocal inserted
+        try:
+            inserted += await run_db(db, bulk.insert_batch, batch)
+        except Exception as e:
+            logger.warning("Bulk insert batch failed (rows %s-%s), retrying row by row: %s", batch_rows[0], batch_rows[-1], e)
+            count, failures = await run_db(db, bulk.insert_rows, batch)
+            inserted += count
+            errors.extend({"row": batch_rows[index], "errors": [{"msg": message}]} for index, message in failures)
+        batch.clear()
+        batch_rows.clear()
+
+    try:
+        async for number, raw in bulk.iter_rows(request, fmt):
+            received += 1
+            try:
+                batch.append(bulk.validate_row(raw))
+                batch_rows.append(number)
+            except Exception as e:
+                errors.append({"row": number, "errors": bulk.row_errors(e)})
+                continue
+            if len(batch) >= bulk.BULK_BATCH_SIZE:
+                await flush()
+        if batch:
+            await flush()
+    except (ValueError, UnicodeDecodeError) as e:
+        kept = f" ({inserted} events in earlier batches were imported)" if inserted else ""
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not parse {fmt} body: {str(e)}{kept}"
+        )
+    finally:
+        if inserted:
+            event_counts.invalidate()
+            response_cache.invalidate_lists()
+            # executemany returns no ids; rebuild the fallback index lazily
+            search.search_index.reset()
+            try:
+                await run_db(db, changefeed.publish, "imported", None, count=inserted)
+            except Exception as e:
+                logger.error("Could not announce bulk import: %s", e)
+
+    logger.info("Bulk import: %s/%s events created by admin %s", inserted, received, current_user.email)
+    return {
+        "received": received,
+        "inserted": inserted,
+        "failed": len(errors),
+        "errors": errors[:bulk.BULK_MAX_REPORTED_ERRORS],
+    }
+
+
+def _event_changes(update: schemas.EventUpdate) -> dict:
+    """Normalized column values for the fields the client sent"""
+    changes = update.dict(exclude_unset=True)
+    for key in ("title", "description", "image_url"):
+        if isinstance(changes.get(key), str):
+            changes[key] = changes[key].strip() or None
+    if "title" in changes and changes["title"] is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Event title cannot be empty."
+        )
+    for key in ("date", "time"):
+        if key in changes and changes[key] is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Event {key} cannot be null."
+            )
+    return changes
+
+
+def _require_data(body) -> None:
+    if not body:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No data provided for update."
+        )
+
+
+@router.patch(
+    "/{event_id}",
+    response_model=schemas.EventOut,
+    summary="Partially update an event",
+    description=(
+        "Change only the fields present in the body; `null` clears the description or image. "
+        "A body that matches the stored event changes nothing (including `updated_at`). "
+        "Requires admin authentication."
+    )
+)
+async def patch_event(
+    event_id: int,
+    update: schemas.EventUpdate,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(require_admin)
+):
+    _require_data(update.__fields_set__)
+    return await run_db(db, _update_event, event_id, _event_changes(update), current_user)
+
+
 @router.put(
     "/{event_id}", 
     response_model=schemas.EventOut,
     summary="Update an existing event",
-    description="Update an existing event by ID. Requires admin authentication."
+    description="Update an existing event by ID. Null or empty values leave a field unchanged. Requires admin authentication."
 )
 async def update_event(
     event_id: int, 
-    request: Request, 
+    payload: dict = Body(...), 
     db: Session = Depends(get_db), 
-    current_user: models.User = Depends(require_admin)
+    current_user: CurrentUser = Depends(require_admin)
 ):
+    _require_data(payload)
+    # PUT keeps its lenient contract: null and "" mean "leave as is"
+    provided = {key: value for key, value in payload.items() if value not in (None, "")}
+    try:
+        update = schemas.EventUpdate.parse_obj(provided)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid event data: " + "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            )
+        )
+    return await run_db(db, _update_event, event_id, _event_changes(update), current_user)
+
+
+def _update_event(db: Session, event_id: int, changes: dict, current_user: CurrentUser):
     try:
         if event_id <= 0:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Event ID must be a positive integer."
             )
-        
-        event = db.get(models.Event, event_id)
-        if not event:
-            logger.warning(f"Event not found for update: ID {event_id}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, 
-                detail=f"Event with ID {event_id} not found."
-            )
-        
-        try:
-            payload: dict = await request.json()
-        except Exception:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, 
-                detail="Invalid JSON body. Please provide valid JSON data."
-            )
 
-        if not payload:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No data provided for update."
-            )
+        updated = db.execute(queries.update_event(event_id, changes)).first() if changes else None
+        if updated is None:
+            current = db.execute(queries.event_by_id(event_id)).first()
+            db.rollback()
+            if current is None:
+                logger.warning("Event not found for update: ID %s", event_id)
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND, 
+                    detail=f"Event with ID {event_id} not found."
+                )
+            # Nothing differs: no write, no invalidation, same ETag
+            logger.info("Event update was a no-op: ID %s by admin %s", event_id, current_user.email)
+            return _event_response(current)
 
-        normalized: dict = {}
-        for key, value in payload.items():
-            if value in (None, ""):
-                continue
-                
-            if key == "title" and isinstance(value, str):
-                value = value.strip()
-                if not value:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="Event title cannot be empty."
-                    )
-                    
-            if key == "date":
-                try:
-                    if isinstance(value, str):
-                        value = date_type.fromisoformat(value)
-                except Exception:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST, 
-                        detail="Invalid date format. Use YYYY-MM-DD"
-                    )
-                    
-            if key == "time":
-                try:
-                    if isinstance(value, str):
-                        value = time_type.fromisoformat(value)
-                except Exception:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST, 
-                        detail="Invalid time format. Use HH:MM or HH:MM:SS"
-                    )
-                    
-            if key == "description" and isinstance(value, str):
-                value = value.strip() if value.strip() else None
-                
-            if key == "image_url" and isinstance(value, str):
-                value = value.strip() if value.strip() else None
-                
-            normalized[key] = value
-
-        for key, value in normalized.items():
-            if hasattr(event, key):
-                setattr(event, key, value)
-        
-        db.add(event)
+        changefeed.notify(db, "updated", updated.id, updated)
         db.commit()
-        db.refresh(event)
+        response_cache.invalidate_event(updated.id)
+        search.search_index.add(updated.id, updated.title, updated.description)
         
-        logger.info(f"Event updated: '{event.title}' (ID: {event.id}) by admin {current_user.email}")
-        return event
+        logger.info("Event updated: '%s' (ID: %s) by admin %s", updated.title, updated.id, current_user.email)
+        return _event_response(updated)
         
     except HTTPException:
         raise
     except IntegrityError as e:
         db.rollback()
-        logger.error(f"Database integrity error during event update: {str(e)}")
+        logger.error("Database integrity error during event update: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to update event due to data constraints."
         )
     except Exception as e:
         db.rollback()
-        logger.error(f"Unexpected error during event update: {str(e)}")
+        logger.error("Unexpected error during event update: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update event. Please try again."
@@ -277,11 +668,15 @@ async def update_event(
     summary="Delete an event",
     description="Delete an event by ID. Requires admin authentication."
 )
-def delete_event(
+async def delete_event(
     event_id: int, 
     db: Session = Depends(get_db), 
-    current_user: models.User = Depends(require_admin)
+    current_user: CurrentUser = Depends(require_admin)
 ):
+    return await run_db(db, _delete_event, event_id, current_user)
+
+
+def _delete_event(db: Session, event_id: int, current_user: CurrentUser):
     try:
         if event_id <= 0:
             raise HTTPException(
@@ -289,26 +684,29 @@ def delete_event(
                 detail="Event ID must be a positive integer."
             )
         
-        event = db.get(models.Event, event_id)
-        if not event:
-            logger.warning(f"Event not found for deletion: ID {event_id}")
+        deleted = db.execute(queries.delete_event(event_id)).first()
+        if deleted is None:
+            db.rollback()
+            logger.warning("Event not found for deletion: ID %s", event_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail=f"Event with ID {event_id} not found."
             )
         
-        event_title = event.title
-        db.delete(event)
+        changefeed.notify(db, "deleted", event_id)
         db.commit()
+        event_counts.invalidate()
+        response_cache.invalidate_event(event_id)
+        search.search_index.remove(event_id)
         
-        logger.info(f"Event deleted: '{event_title}' (ID: {event_id}) by admin {current_user.email}")
+        logger.info("Event deleted: '%s' (ID: %s) by admin %s", deleted.title, event_id, current_user.email)
         return None
         
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
-        logger.error(f"Unexpected error during event deletion: {str(e)}")
+        logger.error("Unexpected error during event deletion: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to delete event. Please try again."
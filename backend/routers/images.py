@@ -0,0 +1,41 @@
+import logging
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import FileResponse
+
+from images import VARIANTS, image_pipeline
+from storage import STORAGE_BACKEND
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/images", tags=["images"])
+
+# Public ids carry a random suffix and are never rewritten, so a rendered
+# variant can be cached by clients and proxies indefinitely.
+VARIANT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.get(
+    "/{variant}/{public_id}",
+    summary="Get a resized image variant",
+    description="Serves the thumb, card or full variant of a locally stored image, rendering it on first request."
+)
+async def get_image_variant(variant: str, public_id: str):
+    if STORAGE_BACKEND != "local" or variant not in VARIANTS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image variant not found")
+
+    try:
+        path = await image_pipeline.variant_path(public_id, variant)
+    except Exception as e:
+        logger.warning("Rendering %s variant of %s failed: %s", variant, public_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Image could not be processed"
+        )
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+
+    return FileResponse(
+        path,
+        media_type=f"image/{image_pipeline.format}",
+        headers={"Cache-Control": VARIANT_CACHE_CONTROL},
+    )
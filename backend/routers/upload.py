@@ -1,19 +1,163 @@
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
-from deps import require_admin
-from cloudinary_config import upload_image
+import logging
+import os
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+
+import schemas
+from deps import CurrentUser, require_admin
+from images import image_pipeline, variant_urls
+from storage import (
+    STORAGE_BACKEND, MAX_UPLOAD_BYTES, IMAGE_EXTENSIONS, UploadTooLarge,
+    image_type, make_public_id, resolve_storage, verify_local_upload,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/upload", tags=["upload"])
 
-@router.post("/image")
+# Room for the multipart boundary and part headers around the image
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+UPLOAD_FORM_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Image must be at most {MAX_UPLOAD_BYTES} bytes"
+    )
+
+
+async def _get_storage():
+    try:
+        return await resolve_storage()
+    except (ImportError, RuntimeError) as e:
+        logger.error("Image storage unavailable: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Image storage is not configured on this server"
+        )
+
+
+def _limited(request: Request, limit: int) -> Request:
+    """``request`` whose body fails with UploadTooLarge once more than
+    ``limit`` bytes arrive, so the multipart parser never spools past it"""
+    received = 0
+
+    async def receive():
+        nonlocal received
+        message = await request.receive()
+        if message["type"] == "http.request":
+            received += len(message.get("body", b""))
+            if received > limit:
+                raise UploadTooLarge(f"Request body exceeds {limit} bytes")
+        return message
+
+    return Request(request.scope, receive)
+
+
+@router.post("/image", openapi_extra=UPLOAD_FORM_SCHEMA)
 async def upload_event_image(
-    file: UploadFile = File(...),
+    request: Request,
     _admin = Depends(require_admin),
 ):
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="File must be an image")
+    # The form is parsed here rather than by a File() parameter, which
+    # FastAPI would spool in full before any check could run
+    limit = MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise _too_large()
+    try:
+        form = await _limited(request, limit).form(max_files=1)
+    except UploadTooLarge:
+        raise _too_large()
+
     try:
-        content = await file.read()
-        image_url = upload_image(content, f"event_{file.filename}")
-        return {"image_url": image_url}
+        file = form.get("file")
+        if not isinstance(file, UploadFile):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Send the image as the 'file' field of a multipart form"
+            )
+        if image_type(file.content_type) is None:
+            raise HTTPException(status_code=400, detail=schemas.IMAGE_TYPE_ERROR)
+        if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+            raise _too_large()
+        storage = await _get_storage()
+        # The multipart parser has already spooled the body; hand the file
+        # object to storage in the threadpool instead of reading it into
+        # memory and uploading on the event loop.
+        public_id = make_public_id(file.filename, file.content_type)
+        image_url = await run_in_threadpool(storage.save, file.file, public_id)
+        if storage.name == "local":
+            image_pipeline.schedule(public_id)
+        return {"image_url": image_url, "variants": variant_urls(image_url)}
+    except HTTPException:
+        raise
+    except UploadTooLarge:
+        raise _too_large()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await form.close()
+
+
+@router.post(
+    "/sign",
+    response_model=schemas.SignedUpload,
+    summary="Get signed parameters for a direct upload",
+    description="Short-lived parameters that let the client upload an image straight to storage. Requires admin authentication."
+)
+async def sign_upload(
+    request: schemas.UploadSignRequest,
+    current_user: CurrentUser = Depends(require_admin),
+):
+    storage = await _get_storage()
+    public_id = make_public_id(request.filename, request.content_type)
+    signed = storage.sign_upload(public_id, request.content_type)
+    logger.info("Signed %s upload %s for admin %s", storage.name, public_id, current_user.email)
+    return {**signed, "public_id": public_id}
+
+
+@router.put(
+    "/local/{public_id}",
+    summary="Direct upload target for the local storage backend",
+    description="Accepts the raw image body for a URL previously returned by /upload/sign."
+)
+async def upload_local(public_id: str, expires: int, signature: str, request: Request):
+    if STORAGE_BACKEND != "local":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Local storage is not enabled")
+    if not verify_local_upload(public_id, expires, signature):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired upload signature")
+    if image_type(request.headers.get("content-type")) is None:
+        raise HTTPException(status_code=400, detail=schemas.IMAGE_TYPE_ERROR)
+    if os.path.splitext(public_id)[1].lower() not in IMAGE_EXTENSIONS:
+        # Only names issued by /upload/sign carry a valid signature, but
+        # those may predate the extension allowlist
+        raise HTTPException(status_code=400, detail=schemas.IMAGE_TYPE_ERROR)
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > MAX_UPLOAD_BYTES:
+        raise _too_large()
+
+    storage = await _get_storage()
+    try:
+        image_url = await storage.save_stream(request.stream(), public_id)
+    except UploadTooLarge:
+        raise _too_large()
+    image_pipeline.schedule(public_id)
+    logger.info("Stored direct upload %s", public_id)
+    return {"image_url": image_url, "variants": variant_urls(image_url)}
@@ -1,15 +1,19 @@
 import logging
+from typing import NamedTuple
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
-from database import get_db
+from database import get_db, run_db, run_session
 import schemas, models
-from auth import get_password_hash, verify_password, create_access_token
-from deps import get_current_user, require_admin
+from auth import create_access_token, decode_access_token
+from hashing import password_hasher
+from deps import CurrentUser, get_current_user, get_current_reader, require_admin, oauth2_scheme
+from revocation import token_denylist
 
 logger = logging.getLogger(__name__)
+access_logger = logging.getLogger(f"{__name__}.access")
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -20,18 +24,24 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
     summary="Create a new user account",
     description="Register a new user with email, password, name, and role. Email must be unique."
 )
-def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    # bcrypt is CPU-bound; keep it off both the event loop and the DB session
+    password_hash = await password_hasher.hash(user.password)
+    return await run_db(db, _create_user, user, password_hash)
+
+
+def _create_user(db: Session, user: schemas.UserCreate, password_hash: str):
     try:
         existing = db.query(models.User).filter(models.User.email == user.email).first()
         if existing:
-            logger.warning(f"Signup attempt with existing email: {user.email}")
+            logger.warning("Signup attempt with existing email: %s", user.email)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, 
                 detail="Email address is already registered. Please use a different email or try logging in."
             )
         
         if user.role not in ["normal", "admin"]:
-            logger.warning(f"Invalid role provided: {user.role}")
+            logger.warning("Invalid role provided: %s", user.role)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid role. Must be 'normal' or 'admin'."
@@ -40,7 +50,7 @@ def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
         user_obj = models.User(
             name=user.name.strip(),
             email=user.email.lower().strip(),
-            password_hash=get_password_hash(user.password),
+            password_hash=password_hash,
             role=user.role or "normal",
         )
         
@@ -48,19 +58,21 @@ def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
         db.commit()
         db.refresh(user_obj)
         
-        logger.info(f"New user created successfully: {user.email} (ID: {user_obj.id})")
+        logger.info("New user created successfully: %s (ID: %s)", user.email, user_obj.id)
         return user_obj
         
+    except HTTPException:
+        raise
     except IntegrityError as e:
         db.rollback()
-        logger.error(f"Database integrity error during signup: {str(e)}")
+        logger.error("Database integrity error during signup: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email address is already registered."
         )
     except Exception as e:
         db.rollback()
-        logger.error(f"Unexpected error during signup: {str(e)}")
+        logger.error("Unexpected error during signup: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while creating your account. Please try again."
@@ -72,27 +84,43 @@ def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
     summary="Authenticate user and get access token",
     description="Login with email and password to receive an access token for API authentication."
 )
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     try:
         email = form_data.username.lower().strip()
-        user = db.query(models.User).filter(models.User.email == email).first()
+        # Short sessions of their own: a request-scoped one would keep its
+        # pooled connection checked out for the whole bcrypt wait
+        user = await run_session(_get_user_by_email, email)
         
         if not user:
-            logger.warning(f"Login attempt with non-existent email: {email}")
+            logger.warning("Login attempt with non-existent email: %s", email)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, 
                 detail="Invalid email or password. Please check your credentials and try again."
             )
         
-        if not verify_password(form_data.password, user.password_hash):
-            logger.warning(f"Failed login attempt for user: {email}")
+        valid, new_hash = await password_hasher.verify_and_update(form_data.password, user.password_hash)
+        if not valid:
+            logger.warning("Failed login attempt for user: %s", email)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, 
                 detail="Invalid email or password. Please check your credentials and try again."
             )
+
+        if new_hash:
+            try:
+                await run_session(_update_password_hash, user.id, new_hash)
+                logger.info("Password rehashed with current cost for user: %s", email)
+            except Exception as e:
+                logger.error("Failed to store rehashed password for user %s: %s", email, e)
         
-        token = create_access_token({"sub": str(user.id), "role": user.role})
-        logger.info(f"Successful login for user: {email} (ID: {user.id})")
+        token = create_access_token({
+            "sub": str(user.id),
+            "role": user.role,
+            "email": user.email,
+            "name": user.name,
+            "ver": user.token_version,
+        })
+        logger.info("Successful login for user: %s (ID: %s)", email, user.id)
         
         return {
             "access_token": token, 
@@ -108,28 +136,63 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error during login: {str(e)}")
+        logger.error("Unexpected error during login: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred during login. Please try again."
         )
 
+class _LoginUser(NamedTuple):
+    """Plain copy of the row, so nothing lazy-loads once its session is closed"""
+    id: int
+    name: str
+    email: str
+    role: str
+    password_hash: str
+    token_version: int
+
+
+def _get_user_by_email(db: Session, email: str):
+    user = db.query(models.User).filter(models.User.email == email).first()
+    if user is None:
+        return None
+    return _LoginUser(user.id, user.name, user.email, user.role, user.password_hash, user.token_version)
+
+def _update_password_hash(db: Session, user_id: int, password_hash: str):
+    try:
+        db.query(models.User).filter(models.User.id == user_id).update({"password_hash": password_hash})
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
 @router.get(
     "/me", 
     response_model=schemas.UserOut,
     summary="Get current user information",
     description="Retrieve the authenticated user's profile information."
 )
-def get_me(current_user: models.User = Depends(get_current_user)):
-    logger.info(f"User profile accessed: {current_user.email} (ID: {current_user.id})")
+async def get_me(current_user: CurrentUser = Depends(get_current_reader)):
+    access_logger.info("User profile accessed: %s (ID: %s)", current_user.email, current_user.id)
     return current_user
 
 @router.post(
     "/logout",
     summary="Logout user",
-    description="Logout the current user (client should discard the access token)."
+    description="Logout the current user. The access token is revoked until it expires."
 )
-def logout(current_user: models.User = Depends(get_current_user)):
-    logger.info(f"User logged out: {current_user.email} (ID: {current_user.id})")
+async def logout(token: str = Depends(oauth2_scheme), current_user: CurrentUser = Depends(get_current_user)):
+    await token_denylist.revoke(decode_access_token(token))
+    logger.info("User logged out: %s (ID: %s)", current_user.email, current_user.id)
     return {"message": "Successfully logged out"}
 
+@router.post(
+    "/logout-all",
+    summary="Logout user everywhere",
+    description="Revoke every access token issued to the current user so far."
+)
+async def logout_all(current_user: CurrentUser = Depends(get_current_user)):
+    await token_denylist.revoke_user(current_user.id)
+    logger.info("User logged out of all sessions: %s (ID: %s)", current_user.email, current_user.id)
+    return {"message": "Successfully logged out of all sessions"}
+
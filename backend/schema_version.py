@@ -0,0 +1,53 @@
+import logging
+import os
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+
+# Newest migration in migrations/versions. Workers compare it with the
+# database at startup instead of reflecting the schema, and migrate.py
+# refuses to run when it disagrees with the migration scripts. Revision ids
+# start with a zero-padded sequence number, so they compare as strings.
+SCHEMA_REVISION = "0006_event_title_prefix"
+
+# "strict" refuses to start against an older schema, "warn" only logs,
+# "off" skips the query altogether
+DB_SCHEMA_CHECK = os.getenv("DB_SCHEMA_CHECK", "strict").lower()
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+def current_revision(engine) -> Optional[str]:
+    with engine.connect() as connection:
+        try:
+            return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+        except SQLAlchemyError:
+            # No alembic_version table: the database was never migrated
+            return None
+
+
+def check_schema_version(engine) -> None:
+    """One indexed read of alembic_version; never touches the catalog"""
+    if DB_SCHEMA_CHECK == "off":
+        return
+    revision = current_revision(engine)
+    if revision is not None and revision >= SCHEMA_REVISION:
+        if revision > SCHEMA_REVISION:
+            # A newer release migrated first during a rolling deploy
+            logger.info("Database schema %s is ahead of %s", revision, SCHEMA_REVISION)
+        return
+
+    message = (
+        f"Database schema is at {revision or 'no revision'}, this build needs {SCHEMA_REVISION}. "
+        "Run `python migrate.py` before starting the API."
+    )
+    if DB_SCHEMA_CHECK == "warn":
+        logger.warning(message)
+        return
+    raise SchemaVersionError(message)
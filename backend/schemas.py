@@ -1,7 +1,12 @@
-from typing import Optional, List
-from datetime import date, time, datetime
+from typing import Dict, Optional, List
+from datetime import date as date_type, time as time_type, datetime
 from pydantic import BaseModel, EmailStr, Field, validator
 
+import images
+import storage
+
+IMAGE_TYPE_ERROR = "File must be a JPEG, PNG, GIF, WebP or AVIF image"
+
 
 class UserBase(BaseModel):
     name: str = Field(
@@ -69,16 +74,17 @@ class EventBase(BaseModel):
         description="Event description",
         example="Join us for our annual company meeting where we'll discuss the year's achievements and future plans."
     )
-    date: date = Field(
+    date: date_type = Field(
         description="Event date",
         example="2024-12-25"
     )
-    time: time = Field(
+    time: time_type = Field(
         description="Event time",
         example="14:30:00"
     )
     image_url: Optional[str] = Field(
         None, 
+        max_length=500, 
         description="URL of the event image",
         example="https://example.com/event-image.jpg"
     )
@@ -99,16 +105,17 @@ class EventUpdate(BaseModel):
         None, 
         description="Event description"
     )
-    date: Optional[date] = Field(
+    date: Optional[date_type] = Field(
         None, 
         description="Event date"
     )
-    time: Optional[time] = Field(
+    time: Optional[time_type] = Field(
         None, 
         description="Event time"
     )
     image_url: Optional[str] = Field(
         None, 
+        max_length=500, 
         description="URL of the event image"
     )
     
@@ -120,18 +127,28 @@ class EventOut(EventBase):
     id: int = Field(description="Event's unique identifier")
     created_at: datetime = Field(description="Event creation timestamp")
     updated_at: datetime = Field(description="Event last update timestamp")
+    variants: Optional[Dict[str, str]] = Field(
+        None,
+        description="Resized WebP/AVIF renditions of the image by variant (thumb, card, full)"
+    )
+
+    @validator('variants', always=True)
+    def derive_variants(cls, v, values):
+        return images.variant_urls(values.get("image_url"))
 
     class Config:
         orm_mode = True
 
 
 class PaginationInfo(BaseModel):
-    page: int = Field(description="Current page number")
+    page: Optional[int] = Field(None, description="Current page number (null when paging by cursor)")
     page_size: int = Field(description="Number of items per page")
-    total_count: int = Field(description="Total number of items")
-    total_pages: int = Field(description="Total number of pages")
+    total_count: Optional[int] = Field(None, description="Total number of items (null when include_total=false)")
+    total_pages: Optional[int] = Field(None, description="Total number of pages (null when include_total=false)")
     has_next: bool = Field(description="Whether there is a next page")
     has_prev: bool = Field(description="Whether there is a previous page")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page")
+    prev_cursor: Optional[str] = Field(None, description="Cursor for the previous page")
 
 
 class EventListResponse(BaseModel):
@@ -139,6 +156,62 @@ class EventListResponse(BaseModel):
     pagination: PaginationInfo = Field(description="Pagination information")
 
 
+class EventSearchHit(EventOut):
+    rank: float = Field(description="Relevance score (higher is better)")
+
+
+class EventSearchResponse(BaseModel):
+    query: str = Field(description="The search query as received")
+    events: List[EventSearchHit] = Field(description="Matching events, best match first")
+
+
+class EventSuggestion(BaseModel):
+    id: int = Field(description="Event's unique identifier")
+    title: str = Field(description="Event title")
+
+
+class CalendarDay(BaseModel):
+    date: date_type = Field(description="Day of the month")
+    count: int = Field(description="Number of events on that day")
+
+
+class CalendarResponse(BaseModel):
+    month: str = Field(description="Month as YYYY-MM")
+    days: List[CalendarDay] = Field(description="Days that have at least one event")
+
+
+class BulkRowError(BaseModel):
+    row: int = Field(description="1-based row number in the submitted payload")
+    errors: List[dict] = Field(description="Validation or database errors for the row")
+
+
+class BulkImportResult(BaseModel):
+    received: int = Field(description="Number of rows read from the payload")
+    inserted: int = Field(description="Number of events created")
+    failed: int = Field(description="Number of rows rejected")
+    errors: List[BulkRowError] = Field(description="Per-row errors (truncated to the first rejected rows)")
+
+
+class UploadSignRequest(BaseModel):
+    filename: str = Field(min_length=1, max_length=255, description="Original file name", example="poster.jpg")
+    content_type: str = Field(description="MIME type of the file", example="image/jpeg")
+
+    @validator('content_type')
+    def validate_content_type(cls, v):
+        if storage.image_type(v) is None:
+            raise ValueError(IMAGE_TYPE_ERROR)
+        return v
+
+
+class SignedUpload(BaseModel):
+    method: str = Field(description="HTTP method to use for the upload")
+    upload_url: str = Field(description="Where to send the file")
+    fields: dict = Field(description="Form fields to send along with the file (multipart POST)")
+    headers: dict = Field(description="Headers to send with the upload")
+    public_id: str = Field(description="Storage key the file will be stored under")
+    expires_at: int = Field(description="Unix time after which the signature is rejected")
+
+
 class Token(BaseModel):
     access_token: str = Field(description="JWT access token")
     token_type: str = Field(default="bearer", description="Token type")
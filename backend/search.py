@@ -0,0 +1,207 @@
+import math
+import os
+import re
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, literal_column
+from sqlalchemy.orm import Session
+
+import models
+
+
+# "auto" uses PostgreSQL full-text search when the database is PostgreSQL
+# and the in-process inverted index otherwise.
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+SEARCH_MAX_PREFIX_EXPANSIONS = int(os.getenv("SEARCH_MAX_PREFIX_EXPANSIONS", "64"))
+
+TITLE_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def to_tsquery_text(terms: List[str], prefix: bool) -> str:
+    # Terms are \w+ only, so they cannot carry tsquery operators
+    parts = list(terms)
+    if prefix:
+        parts[-1] = f"{parts[-1]}:*"
+    return " & ".join(parts)
+
+
+class InvertedIndex:
+    """Pure-Python full-text index over event titles and descriptions.
+
+    Used where PostgreSQL full-text search is unavailable (SQLite, tests).
+    The index is per process, which suits those single-worker setups. It is
+    built lazily from the database on first search and kept current by the
+    event write handlers. Prefix lookups bisect a sorted vocabulary, so
+    typeahead cost depends on the number of matching terms, not on the
+    number of events.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._documents: Dict[int, List[str]] = {}
+        self._vocabulary: List[str] = []
+        self._built = False
+        self._lock = threading.RLock()
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    def reset(self) -> None:
+        with self._lock:
+            self._postings, self._documents, self._vocabulary = {}, {}, []
+            self._built = False
+
+    def build(self, rows) -> None:
+        with self._lock:
+            self.reset()
+            for event_id, title, description in rows:
+                self._add(event_id, title, description)
+            self._built = True
+
+    def add(self, event_id: int, title: str, description: Optional[str]) -> None:
+        with self._lock:
+            if not self._built:
+                return
+            self._remove(event_id)
+            self._add(event_id, title, description)
+
+    def remove(self, event_id: int) -> None:
+        with self._lock:
+            if self._built:
+                self._remove(event_id)
+
+    def _add(self, event_id: int, title: str, description: Optional[str]) -> None:
+        weights: Dict[str, float] = {}
+        for term in tokenize(title):
+            weights[term] = weights.get(term, 0.0) + TITLE_WEIGHT
+        for term in tokenize(description):
+            weights[term] = weights.get(term, 0.0) + DESCRIPTION_WEIGHT
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._vocabulary, term)
+            postings[event_id] = weight
+        self._documents[event_id] = list(weights)
+
+    def _remove(self, event_id: int) -> None:
+        for term in self._documents.pop(event_id, ()):
+            postings = self._postings[term]
+            postings.pop(event_id, None)
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect_left(self._vocabulary, term)]
+
+    def _expand(self, prefix: str) -> List[str]:
+        start = bisect_left(self._vocabulary, prefix)
+        matches = []
+        for term in self._vocabulary[start:start + SEARCH_MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        return matches
+
+    def search(self, terms: List[str], prefix: bool, limit: int, offset: int = 0) -> List[Tuple[int, float]]:
+        """Rank events containing every term (the last one as a prefix if asked)"""
+        with self._lock:
+            total = len(self._documents) or 1
+            scores: Optional[Dict[int, float]] = None
+            for position, term in enumerate(terms):
+                expansions = self._expand(term) if prefix and position == len(terms) - 1 else [term]
+                term_scores: Dict[int, float] = {}
+                for expansion in expansions:
+                    postings = self._postings.get(expansion, {})
+                    idf = math.log(1 + total / (len(postings) or 1))
+                    for event_id, weight in postings.items():
+                        term_scores[event_id] = term_scores.get(event_id, 0.0) + weight * idf
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {event_id: score + term_scores[event_id]
+                              for event_id, score in scores.items() if event_id in term_scores}
+                if not scores:
+                    return []
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+            return ranked[offset:offset + limit]
+
+
+search_index = InvertedIndex()
+
+
+def _use_postgres(db: Session) -> bool:
+    if SEARCH_BACKEND == "auto":
+        return db.get_bind().dialect.name == "postgresql"
+    return SEARCH_BACKEND == "postgres"
+
+
+def _search_postgres(db: Session, terms: List[str], prefix: bool, limit: int, offset: int):
+    vector = literal_column("events.search_vector")
+    query = func.to_tsquery(models.SEARCH_CONFIG, to_tsquery_text(terms, prefix))
+    rank = func.ts_rank(vector, query)
+    return db.query(models.Event, rank.label("rank"))\
+        .filter(vector.op("@@")(query))\
+        .order_by(rank.desc(), models.Event.id)\
+        .offset(offset)\
+        .limit(limit)\
+        .all()
+
+
+def _search_memory(db: Session, terms: List[str], prefix: bool, limit: int, offset: int):
+    if not search_index.built:
+        search_index.build(
+            db.query(models.Event.id, models.Event.title, models.Event.description).yield_per(1000)
+        )
+    ranked = search_index.search(terms, prefix, limit, offset)
+    if not ranked:
+        return []
+    events = {
+        event.id: event
+        for event in db.query(models.Event).filter(models.Event.id.in_([event_id for event_id, _ in ranked]))
+    }
+    return [(events[event_id], score) for event_id, score in ranked if event_id in events]
+
+
+def _title_key(db: Session):
+    # The expression of ix_events_title_prefix (migration 0006): byte order,
+    # so a prefix is a plain range that the index returns already sorted
+    key = func.lower(models.Event.title)
+    return key.collate("C") if db.get_bind().dialect.name == "postgresql" else key
+
+
+def suggest_titles(db: Session, q: str, limit: int = 10):
+    """(id, title) of events whose title starts with ``q``, at most ``limit``.
+
+    One bounded index range scan, whatever the number of events; no
+    full-text matching or ranking.
+    """
+    prefix = q.strip().lower()
+    if not prefix:
+        return []
+    # Smallest string above every string starting with the prefix
+    upper = prefix[:-1] + chr(min(ord(prefix[-1]) + 1, 0x10FFFF))
+    key = _title_key(db)
+    return db.query(models.Event.id, models.Event.title)\
+        .filter(key >= prefix, key < upper)\
+        .order_by(key, models.Event.id)\
+        .limit(limit)\
+        .all()
+
+
+def search_events(db: Session, q: str, prefix: bool = True, limit: int = 20, offset: int = 0):
+    """Return (event, rank) pairs matching every word of ``q``, best first"""
+    terms = tokenize(q)
+    if not terms:
+        return []
+    if _use_postgres(db):
+        return _search_postgres(db, terms, prefix, limit, offset)
+    return _search_memory(db, terms, prefix, limit, offset)
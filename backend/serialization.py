@@ -0,0 +1,76 @@
+from typing import Iterable, Optional, Tuple
+
+import orjson
+
+import images
+
+
+# EventOut fields in declaration order; variants is derived from image_url
+EVENT_FIELDS = ("title", "description", "date", "time", "image_url", "id", "created_at", "updated_at", "variants")
+
+
+def select_fields(fields: Optional[str], summary: bool = False) -> Tuple[str, ...]:
+    """Fields named in a comma-separated ``fields`` parameter, in EventOut order.
+
+    ``summary`` drops the description. Raises ValueError naming any unknown field.
+    """
+    requested = {name.strip() for name in (fields or "").split(",") if name.strip()} or set(EVENT_FIELDS)
+    unknown = requested.difference(EVENT_FIELDS)
+    if unknown:
+        raise ValueError(", ".join(sorted(unknown)))
+    if summary:
+        requested.discard("description")
+    return tuple(name for name in EVENT_FIELDS if name in requested)
+
+
+def event_dict(event) -> dict:
+    """EventOut-shaped dict from an Event row or entity, without validation.
+
+    Only for data read back from the database, which already satisfies
+    EventOut. Keys follow EventOut's field order so the JSON matches what
+    ``EventOut.json()`` produced. orjson writes date, time and datetime
+    values in the same ISO 8601 form as pydantic.
+    """
+    return {
+        "title": event.title,
+        "description": event.description,
+        "date": event.date,
+        "time": event.time,
+        "image_url": event.image_url,
+        "id": event.id,
+        "created_at": event.created_at,
+        "updated_at": event.updated_at,
+        "variants": images.variant_urls(event.image_url),
+    }
+
+
+def partial_event_dict(event, fields: Tuple[str, ...]) -> dict:
+    return {
+        name: images.variant_urls(event.image_url) if name == "variants" else getattr(event, name)
+        for name in fields
+    }
+
+
+def dumps(value) -> str:
+    return orjson.dumps(value).decode()
+
+
+def event_json(event) -> str:
+    return dumps(event_dict(event))
+
+
+def event_list_json(events: Iterable, pagination: dict, fields: Tuple[str, ...] = EVENT_FIELDS) -> str:
+    if fields == EVENT_FIELDS:
+        items = [event_dict(event) for event in events]
+    else:
+        items = [partial_event_dict(event, fields) for event in events]
+    return dumps({"events": items, "pagination": pagination})
+
+
+def search_json(query: str, hits: Iterable) -> str:
+    events = []
+    for event, rank in hits:
+        hit = event_dict(event)
+        hit["rank"] = float(rank)
+        events.append(hit)
+    return dumps({"query": query, "events": events})
@@ -0,0 +1,159 @@
+"""Production server: pre-forked uvicorn workers supervised by gunicorn.
+
+    python serve.py          # WEB_CONCURRENCY workers on HOST:PORT
+
+The app is imported once in the master and then forked, so the workers
+share its code and module-level data copy-on-write. Each worker runs the
+lifespan (schema check, change feed, replica checks) on its own uvloop
+loop with the httptools parser. SIGTERM drains: listening sockets close,
+change streams end so clients reconnect elsewhere, in-flight requests get
+SERVER_GRACEFUL_TIMEOUT seconds, then the lifespan closes the engine pools.
+
+Run migrate.py first; workers refuse to start on an outdated schema.
+"""
+import gc
+import logging
+import math
+import os
+import sys
+
+from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
+from uvicorn.server import Server
+from uvicorn_worker import UvicornWorker
+
+import changefeed
+import database
+from logging_config import LOG_LEVEL, configure_logging
+from replicas import replica_set
+
+logger = logging.getLogger(__name__)
+
+
+def cpu_count() -> int:
+    """CPUs this process may run on, capped by a cgroup v2 quota (containers)"""
+    if hasattr(os, "sched_getaffinity"):
+        count = len(os.sched_getaffinity(0))
+    else:
+        count = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            count = min(count, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+# One async worker per core: each keeps its core busy on its own
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0")) or cpu_count()
+# Pending connections the kernel queues per listening socket during bursts
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+# Longer than the load balancer's idle timeout (60s on most), so it never
+# reuses a connection the server has just closed
+SERVER_KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", "75"))
+# Open connections (change streams included) per worker before new ones get 503; 0 disables
+SERVER_LIMIT_CONCURRENCY = int(os.getenv("SERVER_LIMIT_CONCURRENCY", "10000"))
+# Seconds a stopping worker gets for in-flight requests before it is killed
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+# A worker whose event loop is blocked this long is killed and replaced
+SERVER_TIMEOUT = int(os.getenv("SERVER_TIMEOUT", "60"))
+# Recycle a worker after this many requests (plus up to 10% jitter); 0 never
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "0"))
+
+
+class DrainingServer(Server):
+    def handle_exit(self, sig, frame) -> None:
+        # Open streams would otherwise hold the shutdown until the timeout
+        changefeed.hub.drain()
+        super().handle_exit(sig, frame)
+
+
+class Worker(UvicornWorker):
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "lifespan": "on",
+        "limit_concurrency": SERVER_LIMIT_CONCURRENCY or None,
+        # Leaves the rest of the graceful timeout for the lifespan shutdown
+        "timeout_graceful_shutdown": max(1, SERVER_GRACEFUL_TIMEOUT - 5),
+    }
+
+    async def _serve(self) -> None:
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+
+def _when_ready(arbiter) -> None:
+    connections = database.DB_POOL_SIZE + database.DB_MAX_OVERFLOW
+    logger.info(
+        "Serving on %s with %d workers (up to %d connections per database)",
+        ", ".join(arbiter.cfg.bind), arbiter.cfg.workers, arbiter.cfg.workers * connections,
+    )
+
+
+def _post_fork(arbiter, worker) -> None:
+    # Pooled connections must never be shared between processes; drop any
+    # the master opened without closing them under its feet
+    database.engine.dispose(close=False)
+    if database.async_engine is not None:
+        database.async_engine.sync_engine.dispose(close=False)
+    for replica in replica_set.replicas:
+        replica.engine.dispose(close=False)
+        if replica.async_engine is not None:
+            replica.async_engine.sync_engine.dispose(close=False)
+    # The log listener thread does not survive fork
+    configure_logging()
+
+
+class ServeApplication(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from main import app
+
+        # Objects created while importing the app live for the whole run;
+        # freezing them keeps the workers' collector from writing to (and
+        # so copying) the pages they share with the master
+        gc.collect()
+        gc.freeze()
+        return app
+
+
+def options() -> dict:
+    return {
+        "bind": [f"{HOST}:{PORT}"],
+        "workers": WEB_CONCURRENCY,
+        "worker_class": Worker,
+        "preload_app": True,
+        "backlog": SERVER_BACKLOG,
+        "keepalive": SERVER_KEEPALIVE,
+        "graceful_timeout": SERVER_GRACEFUL_TIMEOUT,
+        "timeout": SERVER_TIMEOUT,
+        "max_requests": SERVER_MAX_REQUESTS,
+        "max_requests_jitter": SERVER_MAX_REQUESTS // 10,
+        "loglevel": LOG_LEVEL.lower(),
+        "when_ready": _when_ready,
+        "post_fork": _post_fork,
+    }
+
+
+def main() -> None:
+    ServeApplication(options()).run()
+
+
+if __name__ == "__main__":
+    main()
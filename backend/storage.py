@@ -0,0 +1,219 @@
+import hashlib
+import hmac
+import os
+import re
+import threading
+import time
+import uuid
+from typing import BinaryIO, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+from starlette.staticfiles import StaticFiles
+
+from auth import SECRET_KEY
+
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "cloudinary")
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_SIGNATURE_TTL_SECONDS = int(os.getenv("UPLOAD_SIGNATURE_TTL_SECONDS", "300"))
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", "uploads")
+LOCAL_STORAGE_URL = os.getenv("LOCAL_STORAGE_URL", "/media")
+
+CHUNK_SIZE = 64 * 1024
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+# The only uploads accepted, with the extension they are stored under.
+# Anything else (SVG, HTML, scripts) could run in the API's origin when
+# served back from LOCAL_STORAGE_URL.
+IMAGE_TYPES = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "image/avif": ".avif",
+}
+IMAGE_EXTENSIONS = frozenset(IMAGE_TYPES.values()) | {".jpeg"}
+
+# Uploaded files are only ever embedded, never opened as a document
+MEDIA_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "Content-Disposition": "attachment",
+    "Content-Security-Policy": "default-src 'none'; sandbox",
+}
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def image_type(content_type: Optional[str]) -> Optional[str]:
+    """The allowed image MIME type ``content_type`` declares, else None"""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return media_type if media_type in IMAGE_TYPES else None
+
+
+def make_public_id(filename: Optional[str], content_type: str) -> str:
+    """Storage key for an uploaded file: sanitized name plus a random suffix.
+
+    The extension comes from the (allowed) content type, never from the
+    client's file name.
+    """
+    stem = os.path.splitext(os.path.basename(filename or "image"))[0]
+    stem = _UNSAFE.sub("_", stem).strip("._")[:60] or "image"
+    return f"event_{stem}_{uuid.uuid4().hex[:8]}{IMAGE_TYPES[image_type(content_type)]}"
+
+
+def copy_limited(source: BinaryIO, target: BinaryIO, limit: int = MAX_UPLOAD_BYTES) -> int:
+    """Copy in chunks, failing as soon as more than ``limit`` bytes were seen"""
+    written = 0
+    while True:
+        chunk = source.read(CHUNK_SIZE)
+        if not chunk:
+            return written
+        written += len(chunk)
+        if written > limit:
+            raise UploadTooLarge(f"Upload exceeds {limit} bytes")
+        target.write(chunk)
+
+
+class CloudinaryStorage:
+    name = "cloudinary"
+
+    def __init__(self):
+        import cloudinary_config
+        self._cloudinary = cloudinary_config
+
+    def save(self, fileobj: BinaryIO, public_id: str) -> str:
+        # The SDK reads the whole file; measure it first, like copy_limited would
+        position = fileobj.tell()
+        size = fileobj.seek(0, os.SEEK_END) - position
+        fileobj.seek(position)
+        if size > MAX_UPLOAD_BYTES:
+            raise UploadTooLarge(f"Upload exceeds {MAX_UPLOAD_BYTES} bytes")
+        return self._cloudinary.upload_image(fileobj, os.path.splitext(public_id)[0])
+
+    def sign_upload(self, public_id: str, content_type: str) -> dict:
+        return self._cloudinary.sign_upload(os.path.splitext(public_id)[0])
+
+
+class LocalStorage:
+    """Files under LOCAL_STORAGE_DIR, served by the app at LOCAL_STORAGE_URL"""
+
+    name = "local"
+
+    def __init__(self, directory: str = LOCAL_STORAGE_DIR, base_url: str = LOCAL_STORAGE_URL):
+        self.directory = directory
+        self.base_url = base_url.rstrip("/")
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, public_id: str) -> str:
+        return os.path.join(self.directory, os.path.basename(public_id))
+
+    def url(self, public_id: str) -> str:
+        return f"{self.base_url}/{public_id}"
+
+    def save(self, fileobj: BinaryIO, public_id: str) -> str:
+        path = self.path(public_id)
+        partial = f"{path}.part"
+        try:
+            with open(partial, "wb") as target:
+                copy_limited(fileobj, target)
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        return self.url(public_id)
+
+    async def save_stream(self, chunks, public_id: str) -> str:
+        """Write an async byte stream (e.g. a raw request body) without buffering it"""
+        path = self.path(public_id)
+        partial = f"{path}.part"
+        received = 0
+        try:
+            target = await run_in_threadpool(open, partial, "wb")
+            try:
+                async for chunk in chunks:
+                    received += len(chunk)
+                    if received > MAX_UPLOAD_BYTES:
+                        raise UploadTooLarge(f"Upload exceeds {MAX_UPLOAD_BYTES} bytes")
+                    await run_in_threadpool(target.write, chunk)
+            finally:
+                await run_in_threadpool(target.close)
+            await run_in_threadpool(os.replace, partial, path)
+        finally:
+            await run_in_threadpool(_remove_if_exists, partial)
+        return self.url(public_id)
+
+    def sign_upload(self, public_id: str, content_type: str) -> dict:
+        expires = int(time.time()) + UPLOAD_SIGNATURE_TTL_SECONDS
+        signature = local_upload_signature(public_id, expires)
+        return {
+            "method": "PUT",
+            "upload_url": f"/api/v1/upload/local/{public_id}?expires={expires}&signature={signature}",
+            "fields": {},
+            "headers": {"Content-Type": content_type},
+            "expires_at": expires,
+        }
+
+
+def _remove_if_exists(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class MediaFiles(StaticFiles):
+    """StaticFiles for LocalStorage: image extensions only, with MEDIA_HEADERS"""
+
+    async def get_response(self, path: str, scope):
+        if os.path.splitext(path)[1].lower() not in IMAGE_EXTENSIONS:
+            raise HTTPException(status_code=404)
+        response = await super().get_response(path, scope)
+        response.headers.update(MEDIA_HEADERS)
+        return response
+
+
+def local_upload_signature(public_id: str, expires: int) -> str:
+    message = f"{public_id}:{expires}".encode()
+    return hmac.new(SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def verify_local_upload(public_id: str, expires: int, signature: str) -> bool:
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(local_upload_signature(public_id, expires), signature)
+
+
+def _create_storage():
+    if STORAGE_BACKEND == "local":
+        return LocalStorage()
+    if STORAGE_BACKEND == "cloudinary":
+        return CloudinaryStorage()
+    raise RuntimeError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """The configured backend, created on first use.
+
+    Creating the Cloudinary backend imports its SDK and checks credentials.
+    Deferring that keeps worker boot cheap and lets a node without image
+    credentials serve everything except uploads.
+    """
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = _create_storage()
+    return _storage
+
+
+async def resolve_storage():
+    """get_storage() for async callers; the first call runs in the threadpool"""
+    if _storage is not None:
+        return _storage
+    return await run_in_threadpool(get_storage)
@@ -1,5 +1,21 @@
 const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
+// After a write the API hands out a deadline until which this client's
+// reads must go to the primary database (read replicas may lag behind).
+// The API is cross-origin and called without credentials, so the cookie
+// carrying it is never stored; echo the header instead.
+const PRIMARY_UNTIL_HEADER = "X-DB-Primary-Until";
+let primaryUntil = null;
+
+function rememberWrite(res) {
+  const until = res.headers.get(PRIMARY_UNTIL_HEADER);
+  if (until) primaryUntil = until;
+}
+
+function getReadHeaders() {
+  return primaryUntil ? { [PRIMARY_UNTIL_HEADER]: primaryUntil } : {};
+}
+
 function getAuthHeaders() {
   if (typeof window === "undefined") return {};
   const token = localStorage.getItem("access_token");
@@ -35,7 +51,7 @@ export async function login(credentials) {
 
 export async function getMe() {
   const res = await fetch(`${API_URL}/auth/me`, {
-    headers: { ...getAuthHeaders() },
+    headers: { ...getAuthHeaders(), ...getReadHeaders() },
     cache: "no-store",
   });
   if (!res.ok) throw new Error(await res.text());
@@ -44,6 +60,7 @@ export async function getMe() {
 
 export async function listEvents(page = 1, pageSize = 10) {
   const res = await fetch(`${API_URL}/events/?page=${page}&page_size=${pageSize}`, { 
+    headers: { ...getReadHeaders() },
     cache: "no-store"
   });
   if (!res.ok) throw new Error(await res.text());
@@ -52,6 +69,7 @@ export async function listEvents(page = 1, pageSize = 10) {
 
 export async function getEvent(id) {
   const res = await fetch(`${API_URL}/events/${id}`, { 
+    headers: { ...getReadHeaders() },
     cache: "no-store"
   });
   if (!res.ok) throw new Error(await res.text());
@@ -65,6 +83,7 @@ export async function createEvent(payload) {
     body: JSON.stringify(payload),
   });
   if (!res.ok) throw new Error(await res.text());
+  rememberWrite(res);
   return res.json();
 }
 
@@ -80,6 +99,7 @@ export async function updateEvent(id, payload) {
     console.error("API Error:", errorText);
     throw new Error(errorText);
   }
+  rememberWrite(res);
   return res.json();
 }
 
@@ -89,6 +109,7 @@ export async function deleteEvent(id) {
     headers: { ...getAuthHeaders() },
   });
   if (!res.ok) throw new Error(await res.text());
+  rememberWrite(res);
 }
 
 export function logout() {